@@ -62,6 +62,7 @@ from django.db.models import Count, Avg, Sum
 from businesses.models import BusinessProfile, AccommodationDetails, ManufacturerDetails
 from packages.models import TourPackage, PackageBooking
 from destinations.models import Destination
+from destinations.recommendations import recommended_for
 
 
 class ProfileView(LoginRequiredMixin, TemplateView):
@@ -90,6 +91,9 @@ class ProfileView(LoginRequiredMixin, TemplateView):
         )
         context['total_bookings'] = booking_stats['total_bookings'] or 0
         context['total_spent'] = booking_stats['total_spent'] or 0
+
+        # Precomputed by the build_recommendations command
+        context['recommended_destinations'] = recommended_for(user)
         
         return context
 
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from businesses.models import BusinessImage, BusinessProfile
+
+
+class Command(BaseCommand):
+    help = "Set BusinessProfile.primary_image from each business's images"
+
+    def handle(self, *args, **options):
+        first_image = BusinessImage.objects.filter(business=OuterRef('pk')).order_by('-is_primary', '-uploaded_at', '-id')
+        updated = BusinessProfile.objects.update(primary_image=Subquery(first_image.values('pk')[:1]))
+        self.stdout.write(self.style.SUCCESS(f"Updated primary image of {updated} businesses"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from businesses import stats
+from businesses.models import BusinessProfile
+
+
+class Command(BaseCommand):
+    help = "Recount the pre-aggregated dashboard stats of travel businesses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('business_ids', nargs='*', type=int, help="Only rebuild these businesses")
+
+    def handle(self, *args, **options):
+        businesses = BusinessProfile.objects.filter(user__user_type='TRAVEL_BUSINESS')
+        if options['business_ids']:
+            businesses = BusinessProfile.objects.filter(pk__in=options['business_ids'])
+
+        count = 0
+        for business in businesses.iterator():
+            stats.rebuild(business)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} businesses"))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+# The search SQL as of this migration (see businesses/search.py), so later
+# changes there do not change (or break) this migration
+INDEX_SQL = [
+    "CREATE VIRTUAL TABLE businesses_search USING fts5(business_name, description, product_category, product_description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER businesses_search_profile_insert AFTER INSERT ON businesses_businessprofile BEGIN INSERT INTO businesses_search(rowid, business_name, description, product_category, product_description) VALUES (new.id, new.business_name, new.description, '', ''); END",
+    'CREATE TRIGGER businesses_search_profile_update AFTER UPDATE OF business_name, description ON businesses_businessprofile BEGIN UPDATE businesses_search SET business_name = new.business_name, description = new.description WHERE rowid = new.id; END',
+    'CREATE TRIGGER businesses_search_profile_delete AFTER DELETE ON businesses_businessprofile BEGIN DELETE FROM businesses_search WHERE rowid = old.id; END',
+    "CREATE TRIGGER businesses_search_details_insert AFTER INSERT ON businesses_manufacturerdetails BEGIN UPDATE businesses_search SET product_category = CASE new.product_category WHEN 'TEXTILES' THEN 'TEXTILES Textiles & Wool' WHEN 'FOOD' THEN 'FOOD Food Products' WHEN 'HANDICRAFTS' THEN 'HANDICRAFTS Handicrafts' WHEN 'JEWELRY' THEN 'JEWELRY Jewelry' WHEN 'OTHER' THEN 'OTHER Other' ELSE COALESCE(new.product_category, '') END, product_description = new.product_description WHERE rowid = new.business_id; END",
+    "CREATE TRIGGER businesses_search_details_update AFTER UPDATE ON businesses_manufacturerdetails BEGIN UPDATE businesses_search SET product_category = '', product_description = '' WHERE rowid = old.business_id; UPDATE businesses_search SET product_category = CASE new.product_category WHEN 'TEXTILES' THEN 'TEXTILES Textiles & Wool' WHEN 'FOOD' THEN 'FOOD Food Products' WHEN 'HANDICRAFTS' THEN 'HANDICRAFTS Handicrafts' WHEN 'JEWELRY' THEN 'JEWELRY Jewelry' WHEN 'OTHER' THEN 'OTHER Other' ELSE COALESCE(new.product_category, '') END, product_description = new.product_description WHERE rowid = new.business_id; END",
+    "CREATE TRIGGER businesses_search_details_delete AFTER DELETE ON businesses_manufacturerdetails BEGIN UPDATE businesses_search SET product_category = '', product_description = '' WHERE rowid = old.business_id; END",
+]
+
+POPULATE_SQL = [
+    'DELETE FROM businesses_search',
+    "INSERT INTO businesses_search(rowid, business_name, description, product_category, product_description) SELECT p.id, p.business_name, p.description, CASE d.product_category WHEN 'TEXTILES' THEN 'TEXTILES Textiles & Wool' WHEN 'FOOD' THEN 'FOOD Food Products' WHEN 'HANDICRAFTS' THEN 'HANDICRAFTS Handicrafts' WHEN 'JEWELRY' THEN 'JEWELRY Jewelry' WHEN 'OTHER' THEN 'OTHER Other' ELSE COALESCE(d.product_category, '') END, COALESCE(d.product_description, '') FROM businesses_businessprofile p LEFT JOIN businesses_manufacturerdetails d ON d.business_id = p.id",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS businesses_search_profile_insert',
+    'DROP TRIGGER IF EXISTS businesses_search_profile_update',
+    'DROP TRIGGER IF EXISTS businesses_search_profile_delete',
+    'DROP TRIGGER IF EXISTS businesses_search_details_insert',
+    'DROP TRIGGER IF EXISTS businesses_search_details_update',
+    'DROP TRIGGER IF EXISTS businesses_search_details_delete',
+    'DROP TABLE IF EXISTS businesses_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in INDEX_SQL + POPULATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0003_business_primary_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=models.Index(fields=['business_type', 'is_verified', 'district'], name='businesses__busines_b04cc1_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:31
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0004_business_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='businessimage',
+            name='image',
+            field=models.ImageField(upload_to='business_images/', validators=[heavenknows.images.validate_image_upload]),
+        ),
+    ]
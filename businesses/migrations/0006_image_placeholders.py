@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:34
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0005_validate_image_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='businessimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='businessimage',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='business_images/', validators=[heavenknows.images.validate_image_upload], width_field='image_width'),
+        ),
+    ]
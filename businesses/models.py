@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from accounts.models import CustomUser
+from heavenknows.images import validate_image_upload
 
 
 class BusinessProfile(models.Model):
@@ -34,6 +35,12 @@ class BusinessProfile(models.Model):
     description = models.TextField(blank=True)
     phone = models.CharField(max_length=15)
     website = models.URLField(blank=True, null=True)
+
+    # Image shown on listing cards: the first of images in their default order.
+    # Kept by refresh_primary_image() so listings can select_related it.
+    primary_image = models.ForeignKey(
+        'BusinessImage', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
     
     # Verification
     is_verified = models.BooleanField(default=False)
@@ -46,9 +53,18 @@ class BusinessProfile(models.Model):
     class Meta:
         verbose_name = "Business Profile"
         verbose_name_plural = "Business Profiles"
+        indexes = [
+            # Local to Global listing and its district facet
+            models.Index(fields=['business_type', 'is_verified', 'district']),
+        ]
 
     def __str__(self):
         return f"{self.business_name} ({self.get_business_type_display()})"
+
+    def refresh_primary_image(self):
+        """Point primary_image at the current first image (or None) after images changed."""
+        self.primary_image = self.images.first()
+        BusinessProfile.objects.filter(pk=self.pk).update(primary_image=self.primary_image)
     
 
 class AccommodationDetails(models.Model):
@@ -104,7 +120,13 @@ class BusinessImage(models.Model):
     Normalized in separate table for multiple images per business.
     """
     business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='business_images/')
+    image = models.ImageField(
+        upload_to='business_images/', validators=[validate_image_upload],
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Tiny preview shown while the image loads (data URI)
+    image_placeholder = models.TextField(blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     is_primary = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -113,4 +135,43 @@ class BusinessImage(models.Model):
         ordering = ['-is_primary', '-uploaded_at']
 
     def __str__(self):
-        return f"Image for {self.business.business_name}"
\ No newline at end of file
+        return f"Image for {self.business.business_name}"
+
+class BusinessStats(models.Model):
+    """
+    Pre-aggregated package and booking counters of a business for the dashboard.
+    Kept in step by TourPackage/PackageBooking saves and deletes (see businesses.stats)
+    and rebuilt from scratch by the rebuild_business_stats command.
+    """
+    business = models.OneToOneField(BusinessProfile, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    # Packages by status
+    draft_packages = models.IntegerField(default=0)
+    published_packages = models.IntegerField(default=0)
+    archived_packages = models.IntegerField(default=0)
+
+    # Bookings by status
+    pending_bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    cancelled_bookings = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+
+    # Sum of total_amount over confirmed and completed bookings
+    confirmed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Business Stats"
+        verbose_name_plural = "Business Stats"
+
+    @property
+    def total_packages(self):
+        return self.draft_packages + self.published_packages + self.archived_packages
+
+    @property
+    def total_bookings(self):
+        return self.pending_bookings + self.confirmed_bookings + self.cancelled_bookings + self.completed_bookings
+
+    def __str__(self):
+        return f"Stats for {self.business.business_name}"
@@ -0,0 +1,158 @@
+"""
+Full-text search over the Local to Global manufacturer catalog.
+
+On SQLite an FTS5 table (businesses_search, rowid = BusinessProfile.id) holds
+business name, description, district, province, product category and product
+description. It is
+kept in step by triggers on the profile and manufacturer details tables, so
+every write path, including queryset updates, updates the index. Matches are
+ranked with bm25, weighting the business name highest. Other databases fall
+back to icontains filtering without ranking.
+"""
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import BusinessProfile, ManufacturerDetails
+
+DISTRICT_FACET_CACHE_KEY = 'local_to_global:districts'
+DISTRICT_FACET_TIMEOUT = 60 * 60
+MAX_TERMS = 8
+
+# bm25 weights per column: business_name, description, district, province,
+# product_category, product_description
+RANK_SQL = (
+    'SELECT bm25(businesses_search, 10.0, 1.0, 3.0, 2.0, 4.0, 2.0) FROM businesses_search '
+    'WHERE businesses_search MATCH %s AND businesses_search.rowid = businesses_businessprofile.id'
+)
+MATCH_SQL = 'SELECT rowid FROM businesses_search WHERE businesses_search MATCH %s'
+
+
+def _category_label_sql(column):
+    """SQL giving the category code followed by its label, so both are searchable."""
+    cases = ' '.join(
+        f"WHEN '{code}' THEN '{code} {label}'" for code, label in ManufacturerDetails.PRODUCT_CATEGORY_CHOICES
+    )
+    return f"CASE {column} {cases} ELSE COALESCE({column}, '') END"
+
+
+def index_sql():
+    """Statements creating the FTS table and its triggers (SQLite only)."""
+    category = _category_label_sql('new.product_category')
+    return [
+        "CREATE VIRTUAL TABLE businesses_search USING fts5("
+        "business_name, description, district, province, product_category, product_description, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+        "CREATE TRIGGER businesses_search_profile_insert AFTER INSERT ON businesses_businessprofile BEGIN "
+        "INSERT INTO businesses_search(rowid, business_name, description, district, province, "
+        "product_category, product_description) "
+        "VALUES (new.id, new.business_name, new.description, new.district, new.province, '', ''); END",
+
+        "CREATE TRIGGER businesses_search_profile_update AFTER UPDATE OF business_name, description, district, province "
+        "ON businesses_businessprofile BEGIN "
+        "UPDATE businesses_search SET business_name = new.business_name, description = new.description, "
+        "district = new.district, province = new.province WHERE rowid = new.id; END",
+
+        "CREATE TRIGGER businesses_search_profile_delete AFTER DELETE ON businesses_businessprofile BEGIN "
+        "DELETE FROM businesses_search WHERE rowid = old.id; END",
+
+        "CREATE TRIGGER businesses_search_details_insert AFTER INSERT ON businesses_manufacturerdetails BEGIN "
+        f"UPDATE businesses_search SET product_category = {category}, "
+        "product_description = new.product_description WHERE rowid = new.business_id; END",
+
+        "CREATE TRIGGER businesses_search_details_update AFTER UPDATE ON businesses_manufacturerdetails BEGIN "
+        "UPDATE businesses_search SET product_category = '', product_description = '' "
+        "WHERE rowid = old.business_id; "
+        f"UPDATE businesses_search SET product_category = {category}, "
+        "product_description = new.product_description WHERE rowid = new.business_id; END",
+
+        "CREATE TRIGGER businesses_search_details_delete AFTER DELETE ON businesses_manufacturerdetails BEGIN "
+        "UPDATE businesses_search SET product_category = '', product_description = '' "
+        "WHERE rowid = old.business_id; END",
+    ]
+
+
+def populate_sql():
+    """Statements refilling the FTS table from the source tables."""
+    return [
+        "DELETE FROM businesses_search",
+        "INSERT INTO businesses_search(rowid, business_name, description, district, province, "
+        "product_category, product_description) "
+        "SELECT p.id, p.business_name, p.description, p.district, p.province, "
+        f"{_category_label_sql('d.product_category')}, "
+        "COALESCE(d.product_description, '') "
+        "FROM businesses_businessprofile p LEFT JOIN businesses_manufacturerdetails d ON d.business_id = p.id",
+    ]
+
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS businesses_search_profile_insert",
+    "DROP TRIGGER IF EXISTS businesses_search_profile_update",
+    "DROP TRIGGER IF EXISTS businesses_search_profile_delete",
+    "DROP TRIGGER IF EXISTS businesses_search_details_insert",
+    "DROP TRIGGER IF EXISTS businesses_search_details_update",
+    "DROP TRIGGER IF EXISTS businesses_search_details_delete",
+    "DROP TABLE IF EXISTS businesses_search",
+]
+
+
+def match_query(text):
+    """FTS5 query matching every word of `text` as a prefix; '' when there are no words."""
+    terms = re.findall(r'\w+', text.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search(queryset, text):
+    """Restrict a BusinessProfile queryset to matches of `text`, best first."""
+    query = match_query(text)
+    if not query:
+        return queryset.annotate(rank=Value(0.0))
+
+    if connection.vendor != 'sqlite':
+        matches = Q()
+        for term in re.findall(r'\w+', text)[:MAX_TERMS]:
+            matches &= (
+                Q(business_name__icontains=term) |
+                Q(description__icontains=term) |
+                Q(district__icontains=term) |
+                Q(province__icontains=term) |
+                Q(manufacturer_details__product_category__icontains=term) |
+                Q(manufacturer_details__product_description__icontains=term)
+            )
+        return queryset.filter(matches).annotate(rank=Value(0.0))
+
+    # The IN subquery runs the MATCH once; bm25 is only computed for matching rows
+    return queryset.filter(id__in=RawSQL(MATCH_SQL, [query])).annotate(rank=RawSQL(RANK_SQL, [query]))
+
+
+def catalog_queryset(text='', district=''):
+    """Verified manufacturers for Local to Global, ranked by `text` when given."""
+    queryset = BusinessProfile.objects.filter(
+        is_verified=True,
+        business_type='MANUFACTURER'
+    ).select_related('user', 'primary_image', 'manufacturer_details')
+    if district:
+        queryset = queryset.filter(district__icontains=district)
+    if text.strip():
+        return search(queryset, text).order_by('rank', '-created_at')
+    return queryset.order_by('-created_at')
+
+
+def district_facet():
+    """Districts of verified manufacturers with their counts, cached."""
+    facet = cache.get(DISTRICT_FACET_CACHE_KEY)
+    if facet is None:
+        facet = list(
+            BusinessProfile.objects.filter(is_verified=True, business_type='MANUFACTURER')
+            .values('district').annotate(count=Count('id')).order_by('district')
+        )
+        cache.set(DISTRICT_FACET_CACHE_KEY, facet, DISTRICT_FACET_TIMEOUT)
+    return facet
+
+
+def invalidate_district_facet():
+    cache.delete(DISTRICT_FACET_CACHE_KEY)
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from heavenknows import images
+from . import search
+from .models import BusinessImage, BusinessProfile
+
+FACET_FIELDS = {'district', 'is_verified', 'business_type'}
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(post_save, sender=BusinessProfile)
+def refresh_district_facet_on_save(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, FACET_FIELDS):
+        transaction.on_commit(search.invalidate_district_facet)
+
+
+@receiver(post_delete, sender=BusinessProfile)
+def refresh_district_facet_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(search.invalidate_district_facet)
+
+
+images.normalize_on_upload(BusinessImage, 'image', placeholder_field='image_placeholder')
@@ -0,0 +1,91 @@
+"""
+Dashboard counters of travel businesses.
+
+TourPackage and PackageBooking apply their own change to the BusinessStats row
+inside the transaction that saves or deletes them, as F() increments, so the
+dashboard reads one row instead of counting packages and bookings. A missing
+row is built from the source tables on first read.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from packages.models import PackageBooking, TourPackage
+from .models import BusinessStats
+
+REVENUE_STATUSES = ('CONFIRMED', 'COMPLETED')
+PACKAGE_FIELDS = {status: f'{status.lower()}_packages' for status, _ in TourPackage.STATUS_CHOICES}
+BOOKING_FIELDS = {status: f'{status.lower()}_bookings' for status, _ in PackageBooking.STATUS_CHOICES}
+
+
+def package_counts(business_id, status):
+    """Counters a package with this status adds to its business."""
+    return business_id, {PACKAGE_FIELDS[status]: 1}
+
+
+def booking_counts(business_id, status, total_amount):
+    """Counters a booking with this status and amount adds to its business."""
+    counts = {BOOKING_FIELDS[status]: 1}
+    if status in REVENUE_STATUSES:
+        counts['confirmed_revenue'] = total_amount
+    return business_id, counts
+
+
+def apply_change(before=None, after=None):
+    """
+    Move a row's contribution from `before` to `after`, both (business_id, counts)
+    pairs or None for inserts and deletes. Must run in the writing transaction.
+    Businesses without a stats row are skipped; their row is built on first read.
+    """
+    apply_changes([(before, after)])
+
+
+def apply_changes(changes):
+    """apply_change for many (before, after) pairs, with one UPDATE per business."""
+    deltas = {}
+    for before, after in changes:
+        for sign, contribution in ((-1, before), (1, after)):
+            if contribution is None:
+                continue
+            business_id, counts = contribution
+            business_deltas = deltas.setdefault(business_id, {})
+            for field, value in counts.items():
+                business_deltas[field] = business_deltas.get(field, 0) + sign * value
+
+    for business_id, business_deltas in deltas.items():
+        changes = {field: F(field) + value for field, value in business_deltas.items() if value}
+        if changes:
+            BusinessStats.objects.filter(pk=business_id).update(**changes)
+
+
+def rebuild(business):
+    """Recount the stats of a business from its packages and bookings."""
+    with transaction.atomic():
+        # Writers update the locked row, so none can slip in between the counts and the save
+        stats, _ = BusinessStats.objects.select_for_update().get_or_create(business=business)
+        values = {field: 0 for field in [*PACKAGE_FIELDS.values(), *BOOKING_FIELDS.values()]}
+
+        packages = TourPackage.objects.filter(travel_business=business)
+        for row in packages.values('status').annotate(n=Count('id')).order_by():
+            values[PACKAGE_FIELDS[row['status']]] = row['n']
+
+        bookings = PackageBooking.objects.filter(travel_business=business)
+        for row in bookings.values('status').annotate(n=Count('id')).order_by():
+            values[BOOKING_FIELDS[row['status']]] = row['n']
+        values['confirmed_revenue'] = bookings.filter(status__in=REVENUE_STATUSES).aggregate(
+            total=Sum('total_amount')
+        )['total'] or Decimal('0')
+
+        for field, value in values.items():
+            setattr(stats, field, value)
+        stats.save()
+    return stats
+
+
+def get_stats(business):
+    """The stats row of a business, built on first use."""
+    try:
+        return BusinessStats.objects.get(pk=business.pk)
+    except BusinessStats.DoesNotExist:
+        return rebuild(business)
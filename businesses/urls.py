@@ -6,7 +6,11 @@ app_name = 'businesses'
 urlpatterns = [
     path('register/', views.BusinessRegisterView.as_view(), name='register'),
     path('dashboard/', views.BusinessDashboardView.as_view(), name='dashboard'),
+    path('dashboard/trends/', views.booking_trends, name='booking_trends'),
+    path('dashboard/bookings/', views.BookingConsoleView.as_view(), name='booking_console'),
+    path('dashboard/bookings/export/', views.export_bookings, name='export_bookings'),
      path('local-to-global/', views.LocalToGlobalView.as_view(), name='local_to_global'),
+    path('local-to-global/api/', views.local_to_global_api, name='local_to_global_api'),
       path('accommodation/update/', views.AccommodationDetailsUpdateView.as_view(), name='update_accommodation'),
     path('manufacturer/update/', views.ManufacturerDetailsUpdateView.as_view(), name='update_manufacturer'),
     path('images/upload/', views.BusinessImageUploadView.as_view(), name='upload_image'),
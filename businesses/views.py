@@ -6,6 +6,7 @@ from django.urls import reverse_lazy
 from django.views.generic import CreateView, TemplateView
 from .forms import BusinessRegistrationForm
 from .models import BusinessProfile, AccommodationDetails, ManufacturerDetails, BusinessImage
+from .stats import get_stats
 from packages.models import TourPackage, PackageReview, PackageBooking
 # import Sum
 from django.db.models import Sum
@@ -98,22 +99,23 @@ class BusinessDashboardView( TemplateView):
             if user.user_type == 'TRAVEL_BUSINESS':
                 packages = TourPackage.objects.filter(travel_business=business)
                 context['packages'] = packages.order_by('-created_at')
-                context['total_packages'] = packages.count()
-                context['published_packages'] = packages.filter(status='PUBLISHED').count()
-                context['draft_packages'] = packages.filter(status='DRAFT').count()
-                
+
+                # Header stats come from the pre-aggregated row
+                stats = get_stats(business)
+                context['stats'] = stats
+                context['total_packages'] = stats.total_packages
+                context['published_packages'] = stats.published_packages
+                context['draft_packages'] = stats.draft_packages
+
                 # Booking stats
-                bookings = PackageBooking.objects.filter(package__travel_business=business)
+                bookings = PackageBooking.objects.filter(travel_business=business)
                 context['bookings'] = bookings.select_related('user', 'package').order_by('-created_at')[:10]
-                context['total_bookings'] = bookings.count()
-                context['pending_bookings'] = bookings.filter(status='PENDING').count()
-                context['confirmed_bookings'] = bookings.filter(status='CONFIRMED').count()
-                
+                context['total_bookings'] = stats.total_bookings
+                context['pending_bookings'] = stats.pending_bookings
+                context['confirmed_bookings'] = stats.confirmed_bookings
+
                 # Revenue stats
-                revenue_stats = bookings.filter(status__in=['CONFIRMED', 'COMPLETED']).aggregate(
-                    total_revenue=Sum('total_amount')
-                )
-                context['total_revenue'] = revenue_stats['total_revenue'] or 0
+                context['total_revenue'] = stats.confirmed_revenue
             
             # Local Business (Hotel/Homestay/Restaurant)
             elif user.user_type == 'LOCAL_BUSINESS':
@@ -143,6 +145,7 @@ class BusinessDashboardView( TemplateView):
 from django.views.generic import ListView
 from django.db.models import Q
 from .models import BusinessProfile
+from .search import catalog_queryset, district_facet
 
 
 class LocalToGlobalView(ListView):
@@ -153,40 +156,18 @@ class LocalToGlobalView(ListView):
     paginate_by = 12
 
     def get_queryset(self):
-        queryset = BusinessProfile.objects.filter(
-            is_verified=True,
-            business_type='MANUFACTURER'
-        ).select_related('user').prefetch_related('images', 'manufacturer_details')
-
-        # Search functionality
-        search_query = self.request.GET.get('search', '')
-        if search_query:
-            queryset = queryset.filter(
-                Q(business_name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(district__icontains=search_query) |
-                Q(province__icontains=search_query) |
-                Q(manufacturer_details__product_category__icontains=search_query) |
-                Q(manufacturer_details__product_description__icontains=search_query)
-            )
-
-        # Filter by location
-        district = self.request.GET.get('district', '')
-        if district:
-            queryset = queryset.filter(district__icontains=district)
-
-        return queryset.order_by('-created_at')
+        return catalog_queryset(
+            self.request.GET.get('search', ''),
+            self.request.GET.get('district', ''),
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_query'] = self.request.GET.get('search', '')
         context['selected_district'] = self.request.GET.get('district', '')
         
-        # Get unique districts for filter dropdown
-        context['districts'] = BusinessProfile.objects.filter(
-            is_verified=True,
-            business_type='MANUFACTURER'
-        ).values_list('district', flat=True).distinct().order_by('district')
+        # District dropdown with counts, cached
+        context['districts'] = district_facet()
         
         return context
     
@@ -252,6 +233,7 @@ class BusinessImageUploadView(LoginRequiredMixin, CreateView):
             BusinessImage.objects.filter(business=image.business, is_primary=True).update(is_primary=False)
         
         image.save()
+        image.business.refresh_primary_image()
         messages.success(self.request, 'Image uploaded successfully!')
         return super().form_valid(form)
 
@@ -264,6 +246,320 @@ class BusinessImageDeleteView(LoginRequiredMixin, DeleteView):
     def get_queryset(self):
         return BusinessImage.objects.filter(business=self.request.user.business_profile)
     
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Image deleted successfully!')
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+    def form_valid(self, form):
+        business = self.object.business
+        response = super().form_valid(form)
+        business.refresh_primary_image()
+        messages.success(self.request, 'Image deleted successfully!')
+        return response
+
+from datetime import date, timedelta
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from packages.models import BookingRollup
+from packages.rollups import month_start
+
+MAX_TREND_DAYS = 731
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+@login_required
+@require_GET
+def booking_trends(request):
+    """
+    Booking and revenue series of the logged-in travel business, read from the
+    booking rollups. Query params: start, end (YYYY-MM-DD, default the last 12
+    months), period (day|month, default month), package (id, optional).
+    """
+    business = BusinessProfile.objects.filter(user=request.user).first()
+    if business is None:
+        return JsonResponse({'success': False, 'error': 'Business account required'}, status=403)
+
+    period = request.GET.get('period', 'month').upper()
+    if period not in ('DAY', 'MONTH'):
+        return JsonResponse({'success': False, 'error': 'period must be day or month'}, status=400)
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else _add_months(end, -11)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid date'}, status=400)
+    if period == 'MONTH':
+        start, end = month_start(start), month_start(end)
+    if start > end:
+        return JsonResponse({'success': False, 'error': 'start must not be after end'}, status=400)
+    if period == 'DAY' and (end - start).days >= MAX_TREND_DAYS:
+        return JsonResponse({'success': False, 'error': f'At most {MAX_TREND_DAYS} days per request'}, status=400)
+
+    rollups = BookingRollup.objects.filter(business=business, period=period, day__range=(start, end))
+    package_id = request.GET.get('package')
+    if package_id:
+        if not package_id.isdigit():
+            return JsonResponse({'success': False, 'error': 'Invalid package'}, status=400)
+        rollups = rollups.filter(package_id=int(package_id))
+
+    fields = ['pending_bookings', 'confirmed_bookings', 'cancelled_bookings', 'completed_bookings', 'travelers', 'revenue']
+    rows = {
+        row['day']: row
+        for row in rollups.values('day').annotate(**{f'sum_{field}': Sum(field) for field in fields}).order_by()
+    }
+
+    # Dense series with zeros for empty days/months
+    series = []
+    day = start
+    while day <= end:
+        row = rows.get(day, {})
+        point = {field: row.get(f'sum_{field}') or 0 for field in fields}
+        point['revenue'] = float(point['revenue'])
+        point['total_bookings'] = sum(point[f] for f in fields[:4])
+        point['date'] = day.isoformat()
+        series.append(point)
+        day = day + timedelta(days=1) if period == 'DAY' else _add_months(day, 1)
+
+    return JsonResponse({
+        'success': True,
+        'period': period.lower(),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': series,
+    })
+
+
+from django.http import StreamingHttpResponse
+from packages import exports
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', exports.stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', exports.stream_xlsx),
+}
+
+
+@login_required
+@require_GET
+def export_bookings(request):
+    """
+    Stream the bookings of the logged-in travel business as CSV or XLSX.
+    Query params: format (csv|xlsx), package (id), status, start, end (booking
+    date, YYYY-MM-DD).
+    """
+    business = BusinessProfile.objects.filter(user=request.user).first()
+    if business is None:
+        return JsonResponse({'success': False, 'error': 'Business account required'}, status=403)
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': 'format must be csv or xlsx'}, status=400)
+
+    bookings = PackageBooking.objects.filter(travel_business=business)
+    package_id = request.GET.get('package')
+    if package_id:
+        if not package_id.isdigit():
+            return JsonResponse({'success': False, 'error': 'Invalid package'}, status=400)
+        bookings = bookings.filter(package_id=int(package_id))
+    status = request.GET.get('status')
+    if status:
+        if status not in dict(PackageBooking.STATUS_CHOICES):
+            return JsonResponse({'success': False, 'error': 'Invalid status'}, status=400)
+        bookings = bookings.filter(status=status)
+    try:
+        if request.GET.get('start'):
+            bookings = bookings.filter(created_at__date__gte=date.fromisoformat(request.GET['start']))
+        if request.GET.get('end'):
+            bookings = bookings.filter(created_at__date__lte=date.fromisoformat(request.GET['end']))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid date'}, status=400)
+
+    content_type, stream = EXPORT_FORMATS[export_format]
+    rows = exports.booking_rows(bookings.order_by('-created_at', '-id'))
+    response = StreamingHttpResponse(stream(exports.booking_header(), rows), content_type=content_type)
+    filename = f"bookings-{timezone.localdate().isoformat()}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+import base64
+import json
+from datetime import datetime
+from django.utils.http import url_has_allowed_host_and_scheme
+from packages import rollups
+
+CONSOLE_PAGE_SIZE = 50
+
+
+def _encode_booking_cursor(created_at, pk):
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), pk]).encode()).decode()
+
+
+def _decode_booking_cursor(cursor):
+    created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+class BookingConsoleView(LoginRequiredMixin, TemplateView):
+    """
+    All bookings of a travel business, newest first, with filters, booking
+    number lookup and keyset pagination. POST applies a status to the
+    selected bookings with one UPDATE.
+    """
+    template_name = 'businesses/booking_console.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.business = BusinessProfile.objects.filter(user=request.user).first()
+            if self.business is None or request.user.user_type != 'TRAVEL_BUSINESS':
+                messages.error(request, 'Access denied. Travel business account required.')
+                return redirect('home')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_filtered_bookings(self):
+        params = self.request.GET
+        bookings = PackageBooking.objects.filter(travel_business=self.business)
+
+        booking_number = params.get('q', '').strip().upper()
+        if booking_number:
+            # Unique index lookup; the other filters do not apply
+            return bookings.filter(booking_number=booking_number)
+
+        if params.get('status') in dict(PackageBooking.STATUS_CHOICES):
+            bookings = bookings.filter(status=params['status'])
+        if params.get('payment_status') in dict(PackageBooking.PAYMENT_STATUS_CHOICES):
+            bookings = bookings.filter(payment_status=params['payment_status'])
+        if params.get('package', '').isdigit():
+            bookings = bookings.filter(package_id=int(params['package']))
+        for param, lookup in (('start', 'created_at__date__gte'), ('end', 'created_at__date__lte')):
+            if params.get(param):
+                try:
+                    bookings = bookings.filter(**{lookup: date.fromisoformat(params[param])})
+                except ValueError:
+                    messages.error(self.request, f'Invalid {param} date, ignored.')
+        return bookings
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        bookings = self.get_filtered_bookings()
+
+        cursor = self.request.GET.get('cursor')
+        if cursor:
+            try:
+                created_at, pk = _decode_booking_cursor(cursor)
+                bookings = bookings.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+            except (ValueError, TypeError):
+                messages.error(self.request, 'Invalid page, showing the newest bookings.')
+
+        page = list(
+            bookings.select_related('package').only(
+                'id', 'booking_number', 'created_at', 'status', 'payment_status', 'lead_traveler_name',
+                'lead_traveler_email', 'number_of_travelers', 'preferred_start_date', 'total_amount',
+                'package__title', 'package__slug',
+            ).order_by('-created_at', '-id')[:CONSOLE_PAGE_SIZE + 1]
+        )
+        has_next = len(page) > CONSOLE_PAGE_SIZE
+        page = page[:CONSOLE_PAGE_SIZE]
+
+        query = self.request.GET.copy()
+        query.pop('cursor', None)
+        if has_next:
+            query['cursor'] = _encode_booking_cursor(page[-1].created_at, page[-1].id)
+            context['next_query'] = query.urlencode()
+        first_query = self.request.GET.copy()
+        first_query.pop('cursor', None)
+
+        context.update({
+            'business': self.business,
+            'bookings': page,
+            'is_first_page': not cursor,
+            'first_query': first_query.urlencode(),
+            'packages': TourPackage.objects.filter(travel_business=self.business).values('id', 'title').order_by('title'),
+            'status_choices': PackageBooking.STATUS_CHOICES,
+            'payment_status_choices': PackageBooking.PAYMENT_STATUS_CHOICES,
+            'filters': self.request.GET,
+        })
+        return context
+
+    def post(self, request, *args, **kwargs):
+        status = request.POST.get('status')
+        booking_ids = [pk for pk in request.POST.getlist('booking_ids') if pk.isdigit()][:CONSOLE_PAGE_SIZE]
+        if status not in dict(PackageBooking.STATUS_CHOICES) or not booking_ids:
+            messages.error(request, 'Select bookings and a status to apply.')
+        else:
+            bookings = PackageBooking.objects.filter(travel_business=self.business, pk__in=booking_ids)
+            updated = rollups.bulk_set_status(bookings, status)
+            label = dict(PackageBooking.STATUS_CHOICES)[status]
+            messages.success(request, f'{updated} booking(s) marked as {label}.')
+
+        next_url = request.POST.get('next')
+        if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            return redirect(next_url)
+        return redirect('businesses:booking_console')
+
+
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+
+
+@require_GET
+def local_to_global_api(request):
+    """
+    JSON pages of the Local to Global catalog for infinite scroll.
+    Query params: search, district, page.
+    """
+    queryset = catalog_queryset(request.GET.get('search', ''), request.GET.get('district', ''))
+    paginator = Paginator(queryset, LocalToGlobalView.paginate_by)
+    try:
+        page = paginator.page(request.GET.get('page', 1))
+    except PageNotAnInteger:
+        return JsonResponse({'success': False, 'error': 'Invalid page'}, status=400)
+    except EmptyPage:
+        return JsonResponse({'success': True, 'results': [], 'next_page': None, 'count': paginator.count})
+
+    results = []
+    for business in page:
+        try:
+            details = business.manufacturer_details
+        except ManufacturerDetails.DoesNotExist:
+            details = None
+        results.append({
+            'id': business.id,
+            'business_name': business.business_name,
+            'district': business.district,
+            'province': business.province,
+            'description': business.description,
+            'phone': business.phone,
+            'email': business.user.email,
+            'website': business.website,
+            'image': business.primary_image.image.url if business.primary_image else None,
+            'image_width': business.primary_image.image_width if business.primary_image else None,
+            'image_height': business.primary_image.image_height if business.primary_image else None,
+            'image_placeholder': business.primary_image.image_placeholder if business.primary_image else '',
+            'product_category': details.get_product_category_display() if details else None,
+            'product_description': details.product_description if details else None,
+        })
+    return JsonResponse({
+        'success': True,
+        'results': results,
+        'next_page': page.next_page_number() if page.has_next() else None,
+        'count': paginator.count,
+    })
+
+
+# ============= Business documents =============
+
+from django.http import Http404
+from heavenknows import media
+
+
+@login_required
+@require_GET
+def business_document(request, path):
+    """Registration documents and request letters, for their business and staff."""
+    business = (
+        BusinessProfile.objects.filter(Q(registration_document=path) | Q(request_letter=path))
+        .only('id', 'user_id').first()
+    )
+    if business is None or not (request.user.is_staff or business.user_id == request.user.id):
+        raise Http404
+    return media.serve_protected(path)
@@ -61,7 +61,7 @@ class DestinationAdmin(admin.ModelAdmin):
     search_fields = ('name', 'district', 'province', 'short_description', 'full_description')
     prepopulated_fields = {'slug': ('name',)}
     inlines = [DestinationImageInline, ItineraryInline]
-    readonly_fields = ('created_at', 'updated_at', 'view_count')
+    readonly_fields = ('created_at', 'updated_at', 'view_count', 'popularity')
     date_hierarchy = 'created_at'
     autocomplete_fields = ('category', 'tags', 'created_by')
     list_editable = ('is_featured', 'is_active')
@@ -88,7 +88,7 @@ class DestinationAdmin(admin.ModelAdmin):
             'fields': ('cover_image', 'video_url', 'has_360_view', 'meta_description')
         }),
         ('Statistics', {
-            'fields': ('view_count', 'is_featured', 'is_active')
+            'fields': (('view_count', 'popularity'), 'is_featured', 'is_active')
         }),
         ('Metadata', {
             'fields': ('created_by', 'created_at', 'updated_at')
@@ -102,7 +102,7 @@ class ItineraryDayInline(admin.TabularInline):
     extra = 0
     fields = (
         'day_number', 'title', 'description', 'location_name',
-        ('latitude', 'longitude'),
+        ('latitude', 'longitude', 'elevation'),
         ('distance_km', 'estimated_hours'),
         ('meals_included', 'accommodation_type'),
     )
@@ -117,7 +117,10 @@ class ItineraryAdmin(admin.ModelAdmin):
     search_fields = ('title', 'destination__name')
     autocomplete_fields = ('destination', 'created_by')
     inlines = [ItineraryDayInline]
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = (
+        'created_at', 'updated_at',
+        'total_distance_km', 'total_hours', 'max_daily_altitude_gain', 'route_polyline',
+    )
     ordering = ('-is_default', 'destination')
 
     fieldsets = (
@@ -127,6 +130,12 @@ class ItineraryAdmin(admin.ModelAdmin):
         ('Additional Info', {
             'fields': ('created_by', 'is_default')
         }),
+        ('Route Metrics', {
+            'fields': (
+                ('total_distance_km', 'total_hours', 'max_daily_altitude_gain'),
+                'route_polyline',
+            )
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
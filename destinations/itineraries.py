@@ -0,0 +1,117 @@
+"""
+Route metrics for itineraries and the cached JSON payload served to the
+duration switcher on the destination detail page.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+
+ITINERARY_CACHE_TIMEOUT = 60 * 60
+
+
+def encode_polyline(points):
+    """Encode (lat, lng) pairs with the Google encoded polyline algorithm."""
+    result = []
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        lat_e5, lng_e5 = int(round(lat * 1e5)), int(round(lng * 1e5))
+        for delta in (lat_e5 - prev_lat, lng_e5 - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lng = lat_e5, lng_e5
+    return ''.join(result)
+
+
+def compute_route_metrics(days):
+    """
+    Roll up ordered day rows of (latitude, longitude, distance_km, estimated_hours, elevation).
+    Altitude gain is measured between consecutive days that both have an elevation.
+    """
+    total_distance = Decimal('0')
+    total_hours = Decimal('0')
+    has_distance = has_hours = False
+    max_gain = None
+    prev_elevation = None
+    points = []
+
+    for latitude, longitude, distance_km, estimated_hours, elevation in days:
+        if distance_km is not None:
+            total_distance += distance_km
+            has_distance = True
+        if estimated_hours is not None:
+            total_hours += estimated_hours
+            has_hours = True
+        if elevation is not None:
+            if prev_elevation is not None:
+                gain = max(elevation - prev_elevation, 0)
+                max_gain = gain if max_gain is None else max(max_gain, gain)
+            prev_elevation = elevation
+        if latitude is not None and longitude is not None:
+            points.append((float(latitude), float(longitude)))
+
+    return {
+        'total_distance_km': total_distance if has_distance else None,
+        'total_hours': total_hours if has_hours else None,
+        'max_daily_altitude_gain': max_gain,
+        'route_polyline': encode_polyline(points),
+    }
+
+
+def itineraries_cache_key(destination_id):
+    return f'destination:{destination_id}:itineraries'
+
+
+def invalidate_itineraries(destination_id):
+    cache.delete(itineraries_cache_key(destination_id))
+
+
+def _decimal(value):
+    return float(value) if value is not None else None
+
+
+def get_itinerary_payloads(destination):
+    """
+    JSON-ready admin itineraries of a destination keyed by duration.
+    The default itinerary wins when several share a duration.
+    """
+    key = itineraries_cache_key(destination.pk)
+    payloads = cache.get(key)
+    if payloads is not None:
+        return payloads
+
+    payloads = {}
+    itineraries = destination.itineraries.filter(source='ADMIN').prefetch_related('days')
+    for itinerary in itineraries:
+        if itinerary.duration_days in payloads:
+            continue
+        payloads[itinerary.duration_days] = {
+            'id': itinerary.id,
+            'title': itinerary.title,
+            'duration_days': itinerary.duration_days,
+            'is_default': itinerary.is_default,
+            'total_distance_km': _decimal(itinerary.total_distance_km),
+            'total_hours': _decimal(itinerary.total_hours),
+            'max_daily_altitude_gain': itinerary.max_daily_altitude_gain,
+            'route_polyline': itinerary.route_polyline,
+            'days': [
+                {
+                    'day_number': day.day_number,
+                    'title': day.title,
+                    'description': day.description,
+                    'location_name': day.location_name,
+                    'latitude': _decimal(day.latitude),
+                    'longitude': _decimal(day.longitude),
+                    'elevation': day.elevation,
+                    'distance_km': _decimal(day.distance_km),
+                    'estimated_hours': _decimal(day.estimated_hours),
+                    'meals_included': day.meals_included,
+                    'accommodation_type': day.accommodation_type,
+                }
+                for day in itinerary.days.all()
+            ],
+        }
+    cache.set(key, payloads, ITINERARY_CACHE_TIMEOUT)
+    return payloads
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from heavenknows import images
+
+
+class Command(BaseCommand):
+    help = "Store dimensions and placeholders for existing images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute rows that already have a placeholder")
+
+    def handle(self, *args, **options):
+        for model, field_name, placeholder_field in images.registered_fields:
+            field = model._meta.get_field(field_name)
+            queryset = model._default_manager.exclude(Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''}))
+            if not options['all']:
+                missing = Q()
+                for name, _ in images.dimension_fields(model, field_name):
+                    missing |= Q(**{name: None})
+                if placeholder_field:
+                    missing |= Q(**{placeholder_field: ''})
+                queryset = queryset.filter(missing)
+
+            updated = failed = 0
+            for pk, name in queryset.values_list('pk', field_name).order_by('pk').iterator(chunk_size=200):
+                try:
+                    with field.storage.open(name, 'rb') as f:
+                        updates = images.describe_updates(model, field_name, f.read(), placeholder_field)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model._meta.label} {pk}: could not read {name}: {e}")
+                    continue
+                # Skip rows whose image was replaced meanwhile
+                updated += model._default_manager.filter(pk=pk, **{field_name: name}).update(**updates)
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.label}.{field_name}: updated {updated}, failed {failed}"
+            ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from destinations.models import Destination
+from destinations.seasons import parse_season_mask
+
+
+class Command(BaseCommand):
+    help = "Parse Destination.best_season into season_mask for existing rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        changed = []
+        total = 0
+
+        queryset = Destination.objects.only('id', 'best_season', 'season_mask').order_by('id')
+        for destination in queryset.iterator(chunk_size=batch_size):
+            mask = parse_season_mask(destination.best_season)
+            if mask != destination.season_mask:
+                destination.season_mask = mask
+                changed.append(destination)
+            if len(changed) >= batch_size:
+                Destination.objects.bulk_update(changed, ['season_mask'])
+                total += len(changed)
+                changed = []
+
+        if changed:
+            Destination.objects.bulk_update(changed, ['season_mask'])
+            total += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated season mask for {total} destinations"))
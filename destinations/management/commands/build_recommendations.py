@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from destinations import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute personalized destination recommendations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Rescore every user, not only those with new activity (also drops undone likes and reviews)",
+        )
+
+    def handle(self, *args, **options):
+        count = recommendations.build(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed recommendations for {count} users"))
@@ -0,0 +1,85 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from heavenknows.storage import BLOB_DIR, DedupFileSystemStorage, file_digest
+
+STALE_UPLOAD_AGE = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Move existing media into the content-addressed blob store, merging duplicate files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be merged without changing files")
+        parser.add_argument('--gc', action='store_true', help="Also remove blobs no media file refers to")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, DedupFileSystemStorage):
+            raise CommandError("The default storage is not DedupFileSystemStorage")
+        storage = default_storage
+        dry_run = options['dry_run']
+
+        scanned = merged = saved = 0
+        seen = {}  # digest -> first path, for dry runs where blobs are not written
+        for root, directories, files in os.walk(storage.location):
+            if os.path.normpath(root) == os.path.normpath(storage.location):
+                directories[:] = [d for d in directories if d != BLOB_DIR]
+            for filename in files:
+                path = os.path.join(root, filename)
+                if os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                scanned += 1
+                stat = os.stat(path)
+                digest = file_digest(path)
+                blob = storage.blob_path(digest)
+
+                if os.path.exists(blob):
+                    if os.stat(blob).st_ino == stat.st_ino:
+                        continue
+                    duplicate = True
+                else:
+                    duplicate = digest in seen
+
+                if duplicate:
+                    merged += 1
+                    # Only the last name of an inode frees its space
+                    if stat.st_nlink == 1:
+                        saved += stat.st_size
+                    self.stdout.write(f"Duplicate: {os.path.relpath(path, storage.location)}")
+                seen.setdefault(digest, path)
+                if dry_run:
+                    continue
+
+                if not os.path.exists(blob):
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    os.link(path, blob)
+                else:
+                    # Swap the file for a link to the blob atomically
+                    tmp_path = f"{path}.dedupe-{os.getpid()}"
+                    os.link(blob, tmp_path)
+                    os.replace(tmp_path, path)
+
+        removed = 0
+        if options['gc'] and os.path.isdir(storage.blob_root):
+            now = time.time()
+            for root, _, files in os.walk(storage.blob_root):
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    stat = os.stat(path)
+                    if filename.startswith('.upload-'):
+                        stale = now - stat.st_mtime > STALE_UPLOAD_AGE
+                    else:
+                        stale = stat.st_nlink == 1
+                    if stale:
+                        removed += 1
+                        if not dry_run:
+                            os.remove(path)
+
+        merge, remove = ("Would merge", "would remove") if dry_run else ("Merged", "removed")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} files. {merge} {merged} duplicates, freeing {saved / 1024 / 1024:.1f} MB; "
+            f"{remove} {removed} unreferenced blobs"
+        ))
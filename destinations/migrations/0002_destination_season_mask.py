@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='season_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['is_active', 'season_mask'], name='destination_is_acti_3e25df_idx'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:12
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# Copied from destinations.itineraries as of this migration, so later
+# changes there do not change (or break) this backfill
+
+
+def encode_polyline(points):
+    """Encode (lat, lng) pairs with the Google encoded polyline algorithm."""
+    result = []
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        lat_e5, lng_e5 = int(round(lat * 1e5)), int(round(lng * 1e5))
+        for delta in (lat_e5 - prev_lat, lng_e5 - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lng = lat_e5, lng_e5
+    return ''.join(result)
+
+
+def compute_route_metrics(days):
+    """
+    Roll up ordered day rows of (latitude, longitude, distance_km, estimated_hours, elevation).
+    Altitude gain is measured between consecutive days that both have an elevation.
+    """
+    total_distance = Decimal('0')
+    total_hours = Decimal('0')
+    has_distance = has_hours = False
+    max_gain = None
+    prev_elevation = None
+    points = []
+
+    for latitude, longitude, distance_km, estimated_hours, elevation in days:
+        if distance_km is not None:
+            total_distance += distance_km
+            has_distance = True
+        if estimated_hours is not None:
+            total_hours += estimated_hours
+            has_hours = True
+        if elevation is not None:
+            if prev_elevation is not None:
+                gain = max(elevation - prev_elevation, 0)
+                max_gain = gain if max_gain is None else max(max_gain, gain)
+            prev_elevation = elevation
+        if latitude is not None and longitude is not None:
+            points.append((float(latitude), float(longitude)))
+
+    return {
+        'total_distance_km': total_distance if has_distance else None,
+        'total_hours': total_hours if has_hours else None,
+        'max_daily_altitude_gain': max_gain,
+        'route_polyline': encode_polyline(points),
+    }
+
+
+def backfill_route_metrics(apps, schema_editor):
+    Itinerary = apps.get_model('destinations', 'Itinerary')
+    ItineraryDay = apps.get_model('destinations', 'ItineraryDay')
+    for itinerary in Itinerary.objects.all().iterator():
+        days = ItineraryDay.objects.filter(itinerary=itinerary).order_by('day_number').values_list(
+            'latitude', 'longitude', 'distance_km', 'estimated_hours', 'elevation'
+        )
+        Itinerary.objects.filter(pk=itinerary.pk).update(**compute_route_metrics(days))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0002_destination_season_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itinerary',
+            name='max_daily_altitude_gain',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='In meters', null=True),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='route_polyline',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='total_distance_km',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='total_hours',
+            field=models.DecimalField(blank=True, decimal_places=1, editable=False, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='itineraryday',
+            name='elevation',
+            field=models.PositiveIntegerField(blank=True, help_text='Elevation in meters', null=True),
+        ),
+        migrations.RunPython(backfill_route_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0003_itinerary_route_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='destination_is_acti_24a39e_idx'),
+        ),
+    ]
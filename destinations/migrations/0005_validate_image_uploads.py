@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:31
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0004_destination_picker_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='destination',
+            name='cover_image',
+            field=models.ImageField(upload_to='destinations/', validators=[heavenknows.images.validate_image_upload]),
+        ),
+        migrations.AlterField(
+            model_name='destinationimage',
+            name='image',
+            field=models.ImageField(upload_to='destination_images/', validators=[heavenknows.images.validate_image_upload]),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:34
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0005_validate_image_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='cover_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='cover_image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='cover_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='destinationimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='destinationimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destinationimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='destination',
+            name='cover_image',
+            field=models.ImageField(height_field='cover_image_height', upload_to='destinations/', validators=[heavenknows.images.validate_image_upload], width_field='cover_image_width'),
+        ),
+        migrations.AlterField(
+            model_name='destinationimage',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='destination_images/', validators=[heavenknows.images.validate_image_upload], width_field='image_width'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0007_destination_recommendations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['is_active', '-popularity', '-id'], name='destination_is_acti_a5b0a1_idx'),
+        ),
+    ]
@@ -1,6 +1,12 @@
 from django.db import models
+from django.db.models import F
 from django.utils.text import slugify
 
+from heavenknows.images import validate_image_upload
+
+from .itineraries import compute_route_metrics, invalidate_itineraries
+from .seasons import parse_season_mask
+
 
 class Category(models.Model):
     """
@@ -47,6 +53,15 @@ class Tag(models.Model):
         return self.name
 
 
+class DestinationQuerySet(models.QuerySet):
+
+    def in_season(self, mask):
+        """Destinations whose best season overlaps any month in the given mask."""
+        if not mask:
+            return self
+        return self.alias(season_overlap=F('season_mask').bitand(mask)).filter(season_overlap__gt=0)
+
+
 class Destination(models.Model):
     """
     Main destination model with all details.
@@ -83,9 +98,17 @@ class Destination(models.Model):
     expected_cost_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default='MODERATE')
     best_season = models.CharField(max_length=100, blank=True)  # e.g., "March-May, September-November"
+    # 12-bit month mask parsed from best_season (bit 0 = January), see seasons.py
+    season_mask = models.PositiveSmallIntegerField(default=0, editable=False)
     
     # Media
-    cover_image = models.ImageField(upload_to='destinations/')
+    cover_image = models.ImageField(
+        upload_to='destinations/', validators=[validate_image_upload],
+    )
+    cover_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Tiny preview shown while the image loads (data URI)
+    cover_image_placeholder = models.TextField(blank=True, editable=False)
     video_url = models.URLField(blank=True, null=True)
     has_360_view = models.BooleanField(default=False)
     
@@ -94,6 +117,8 @@ class Destination(models.Model):
     
     # Stats
     view_count = models.PositiveIntegerField(default=0)
+    # Decayed views, bookings and reviews, see packages/popularity.py
+    popularity = models.FloatField(default=0, editable=False)
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     
@@ -101,16 +126,29 @@ class Destination(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey('accounts.CustomUser', on_delete=models.SET_NULL, null=True, related_name='created_destinations')
 
+    objects = DestinationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-is_featured', '-created_at']
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['category', '-created_at']),
+            # Lets the bitwise season test run on (is_active, season_mask) index entries;
+            # it cannot seek, and in_season() lists still read rows and sort them
+            models.Index(fields=['is_active', 'season_mask']),
+            # Keyset pagination of the destination picker (name, id)
+            models.Index(fields=['is_active', 'name', 'id']),
+            # "Most popular" sort of the destination list
+            models.Index(fields=['is_active', '-popularity', '-id']),
         ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        self.season_mask = parse_season_mask(self.best_season)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'best_season' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'season_mask'}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -123,7 +161,13 @@ class DestinationImage(models.Model):
     Normalized for multiple images per destination.
     """
     destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='destination_images/')
+    image = models.ImageField(
+        upload_to='destination_images/', validators=[validate_image_upload],
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Tiny preview shown while the image loads (data URI)
+    image_placeholder = models.TextField(blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     is_360 = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
@@ -157,6 +201,13 @@ class Itinerary(models.Model):
     created_by = models.ForeignKey('accounts.CustomUser', on_delete=models.SET_NULL, null=True, blank=True)
     
     is_default = models.BooleanField(default=False)  # Default itinerary to show
+    
+    # Route metrics rolled up from the days, see update_route_metrics()
+    total_distance_km = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True, editable=False)
+    total_hours = models.DecimalField(max_digits=6, decimal_places=1, null=True, blank=True, editable=False)
+    max_daily_altitude_gain = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="In meters")
+    route_polyline = models.TextField(blank=True, editable=False)  # Encoded polyline of day locations
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -164,6 +215,27 @@ class Itinerary(models.Model):
         verbose_name_plural = "Itineraries"
         ordering = ['-is_default', 'duration_days']
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_itineraries(self.destination_id)
+
+    def delete(self, *args, **kwargs):
+        destination_id = self.destination_id
+        result = super().delete(*args, **kwargs)
+        invalidate_itineraries(destination_id)
+        return result
+
+    def update_route_metrics(self):
+        """Recompute the rolled-up route metrics from the itinerary days."""
+        days = self.days.order_by('day_number').values_list(
+            'latitude', 'longitude', 'distance_km', 'estimated_hours', 'elevation'
+        )
+        metrics = compute_route_metrics(days)
+        for field, value in metrics.items():
+            setattr(self, field, value)
+        Itinerary.objects.filter(pk=self.pk).update(**metrics)
+        invalidate_itineraries(self.destination_id)
+
     def __str__(self):
         return f"{self.title} ({self.duration_days} days) - {self.destination.name}"
 
@@ -182,6 +254,7 @@ class ItineraryDay(models.Model):
     location_name = models.CharField(max_length=255, blank=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    elevation = models.PositiveIntegerField(null=True, blank=True, help_text="Elevation in meters")
     
     # Walking/trekking distance
     distance_km = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
@@ -193,5 +266,36 @@ class ItineraryDay(models.Model):
         ordering = ['itinerary', 'day_number']
         unique_together = ['itinerary', 'day_number']
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.itinerary.update_route_metrics()
+
+    def delete(self, *args, **kwargs):
+        itinerary = self.itinerary
+        result = super().delete(*args, **kwargs)
+        itinerary.update_route_metrics()
+        return result
+
+    def __str__(self):
+        return f"Day {self.day_number}: {self.title}"
+
+class DestinationRecommendation(models.Model):
+    """
+    A user's top destinations, best first, written by the
+    build_recommendations command (see recommendations.py).
+    """
+    user = models.ForeignKey('accounts.CustomUser', on_delete=models.CASCADE, related_name='destination_recommendations')
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['user', 'rank']
+        constraints = [
+            # Also the index pages read a user's list through
+            models.UniqueConstraint(fields=['user', 'rank'], name='destination_recommendation_rank'),
+        ]
+
     def __str__(self):
-        return f"Day {self.day_number}: {self.title}"
\ No newline at end of file
+        return f"#{self.rank} for user {self.user_id}: destination {self.destination_id}"
@@ -0,0 +1,207 @@
+"""
+Personalized destination recommendations.
+
+The build_recommendations command turns what users did into a sparse
+user x destination affinity matrix. Each action adds a weight to the
+destinations involved:
+
+    liked an explore post about the destination     LIKE_WEIGHT
+    booked a package visiting it (not cancelled)    BOOKING_WEIGHT
+    reviewed such a package                         (rating - 3) * REVIEW_WEIGHT
+
+Summed weights are damped with a signed log, so one heavy user does not
+dominate a destination's column. Destinations are compared by the cosine of
+their columns, and a user's scores are their affinity row times that
+item-item similarity matrix. Destinations the user already interacted with
+are skipped, and the top RECOMMENDATIONS_PER_USER are stored as
+DestinationRecommendation rows, which pages read with a single query
+(recommended_for()).
+
+Without SciPy, the interactions are kept as (user, destination, weight)
+arrays and the similarity matrix is accumulated from dense blocks of
+BLOCK_USERS users at a time: memory grows with the number of destinations
+squared, not with the number of users.
+
+Runs are incremental: only users with an action newer than their stored
+recommendations are rescored (against a similarity matrix built from
+everyone's actions); users with nothing to recommend have no rows and are
+rescored every run. Undone actions (unlikes, deleted reviews) leave no
+timestamp behind, so a periodic full run picks those up.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from explore.models import PostLike
+from packages.models import PackageBooking, PackageReview
+from .models import Destination, DestinationRecommendation
+
+LIKE_WEIGHT = 1.0
+BOOKING_WEIGHT = 3.0
+REVIEW_WEIGHT = 1.0
+
+RECOMMENDATIONS_PER_USER = 12
+BLOCK_USERS = 1024
+
+
+class Interactions:
+    """Damped affinities as parallel arrays, one entry per (user, destination)."""
+
+    def __init__(self, rows, cols, values, user_ids, destination_ids, last_action):
+        self.rows = rows  # index into user_ids
+        self.cols = cols  # index into destination_ids
+        self.values = values
+        self.user_ids = user_ids
+        self.destination_ids = destination_ids
+        self.last_action = last_action  # user id -> time of their latest action
+
+    @classmethod
+    def load(cls):
+        users, destinations, weights = [], [], []
+        last_action = {}
+
+        def add(user_id, destination_id, weight, at):
+            users.append(user_id)
+            destinations.append(destination_id)
+            weights.append(weight)
+            if user_id not in last_action or at > last_action[user_id]:
+                last_action[user_id] = at
+
+        likes = PostLike.objects.filter(post__destination__isnull=False).values_list(
+            'user_id', 'post__destination_id', 'created_at'
+        )
+        for user_id, destination_id, at in likes.iterator(chunk_size=2000):
+            add(user_id, destination_id, LIKE_WEIGHT, at)
+
+        # One row per destination the package visits
+        bookings = PackageBooking.objects.exclude(status='CANCELLED').filter(
+            package__destinations__isnull=False
+        ).values_list('user_id', 'package__destinations', 'updated_at')
+        for user_id, destination_id, at in bookings.iterator(chunk_size=2000):
+            add(user_id, destination_id, BOOKING_WEIGHT, at)
+
+        reviews = PackageReview.objects.filter(package__destinations__isnull=False).values_list(
+            'user_id', 'package__destinations', 'rating', 'updated_at'
+        )
+        for user_id, destination_id, rating, at in reviews.iterator(chunk_size=2000):
+            add(user_id, destination_id, (rating - 3) * REVIEW_WEIGHT, at)
+
+        user_ids, rows = np.unique(np.array(users, dtype=np.int64), return_inverse=True)
+        destination_ids, cols = np.unique(np.array(destinations, dtype=np.int64), return_inverse=True)
+        # Sum repeated (user, destination) pairs
+        keys, inverse = np.unique(rows * len(destination_ids) + cols, return_inverse=True)
+        sums = np.bincount(inverse, weights=np.array(weights, dtype=np.float64))
+        values = (np.sign(sums) * np.log1p(np.abs(sums))).astype(np.float32)
+        rows, cols = np.divmod(keys, max(len(destination_ids), 1))
+        return cls(rows, cols, values, user_ids, destination_ids, last_action)
+
+    def block(self, user_indexes):
+        """Dense affinity rows of the given users (sorted user indexes)."""
+        dense = np.zeros((len(user_indexes), len(self.destination_ids)), dtype=np.float32)
+        # Entries are sorted by user, so only this slice can belong to the block
+        lo = np.searchsorted(self.rows, user_indexes[0])
+        hi = np.searchsorted(self.rows, user_indexes[-1], side='right')
+        rows, cols, values = self.rows[lo:hi], self.cols[lo:hi], self.values[lo:hi]
+        positions = np.minimum(np.searchsorted(user_indexes, rows), len(user_indexes) - 1)
+        selected = user_indexes[positions] == rows
+        dense[positions[selected], cols[selected]] = values[selected]
+        return dense
+
+
+def similarity(interactions):
+    """Cosine similarity between destination columns, zero on the diagonal."""
+    size = len(interactions.destination_ids)
+    gram = np.zeros((size, size), dtype=np.float32)
+    user_indexes = np.arange(len(interactions.user_ids))
+    for start in range(0, len(user_indexes), BLOCK_USERS):
+        block = interactions.block(user_indexes[start:start + BLOCK_USERS])
+        gram += block.T @ block
+    norms = np.sqrt(np.diag(gram))
+    norms[norms == 0] = 1
+    gram /= norms[:, None]
+    gram /= norms[None, :]
+    np.fill_diagonal(gram, 0)
+    return gram
+
+
+def top_destinations(interactions, sim, user_indexes, active, limit=RECOMMENDATIONS_PER_USER):
+    """
+    {user id: [(destination id, score), ...] best first} for the given users.
+    `active` masks the destinations that may be recommended.
+    """
+    results = {}
+    for start in range(0, len(user_indexes), BLOCK_USERS):
+        indexes = user_indexes[start:start + BLOCK_USERS]
+        block = interactions.block(indexes)
+        scores = block @ sim
+        scores[(block != 0) | ~active[None, :]] = 0
+        count = min(limit, scores.shape[1])
+        if not count:
+            break
+        top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        for row, user_index in enumerate(indexes):
+            best = sorted(top[row], key=lambda col: -scores[row, col])
+            results[int(interactions.user_ids[user_index])] = [
+                (int(interactions.destination_ids[col]), float(scores[row, col]))
+                for col in best if scores[row, col] > 0
+            ]
+    return results
+
+
+def build(full=False):
+    """
+    Recompute stored recommendations: for every user with actions when
+    `full`, otherwise for users who acted since their last computation.
+    Returns the number of users rescored.
+    """
+    started = timezone.now()
+    interactions = Interactions.load()
+    if not len(interactions.user_ids):
+        if full:
+            DestinationRecommendation.objects.all().delete()
+        return 0
+
+    if full:
+        targets = np.arange(len(interactions.user_ids))
+    else:
+        computed = dict(
+            DestinationRecommendation.objects.values('user_id').annotate(at=Max('computed_at')).values_list('user_id', 'at')
+        )
+        targets = np.array([
+            index for index, user_id in enumerate(interactions.user_ids.tolist())
+            if user_id not in computed or interactions.last_action[user_id] > computed[user_id]
+        ], dtype=np.int64)
+        if not len(targets):
+            return 0
+
+    active_ids = set(Destination.objects.filter(is_active=True).values_list('id', flat=True))
+    active = np.array([pk in active_ids for pk in interactions.destination_ids.tolist()], dtype=bool)
+    results = top_destinations(interactions, similarity(interactions), targets, active)
+
+    user_ids = list(results)
+    for start in range(0, len(user_ids), BLOCK_USERS):
+        chunk = user_ids[start:start + BLOCK_USERS]
+        with transaction.atomic():
+            DestinationRecommendation.objects.filter(user_id__in=chunk).delete()
+            DestinationRecommendation.objects.bulk_create([
+                DestinationRecommendation(
+                    user_id=user_id, destination_id=destination_id, rank=rank, score=score, computed_at=started,
+                )
+                for user_id in chunk
+                for rank, (destination_id, score) in enumerate(results[user_id], start=1)
+            ], batch_size=500)
+    if full:
+        # Users left without any actions
+        DestinationRecommendation.objects.filter(computed_at__lt=started).delete()
+    return len(user_ids)
+
+
+def recommended_for(user, limit=6):
+    """The user's recommended active destinations, best first, in one query."""
+    if not user.is_authenticated:
+        return []
+    recommendations = DestinationRecommendation.objects.filter(
+        user=user, destination__is_active=True
+    ).select_related('destination', 'destination__category').order_by('rank')[:limit]
+    return [recommendation.destination for recommendation in recommendations]
@@ -0,0 +1,140 @@
+"""
+Parsing of the free-text `Destination.best_season` field into a 12-bit month mask.
+
+Bit 0 is January, bit 11 is December. A destination is "in season" for a month
+when that month's bit is set, so filtering is a single bitwise AND on an integer
+column instead of a text search.
+"""
+import calendar
+import re
+from datetime import date
+
+ALL_MONTHS = (1 << 12) - 1
+
+MONTH_NAMES = {
+    'jan': 1, 'january': 1,
+    'feb': 2, 'february': 2,
+    'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4,
+    'may': 5,
+    'jun': 6, 'june': 6,
+    'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9,
+    'oct': 10, 'october': 10,
+    'nov': 11, 'november': 11,
+    'dec': 12, 'december': 12,
+}
+
+MONTH_CHOICES = [(str(month), calendar.month_name[month]) for month in range(1, 13)]
+
+# Seasons as used for Nepal travel (spring/autumn trekking, summer monsoon)
+SEASON_NAMES = {
+    'spring': (3, 5),
+    'summer': (6, 8),
+    'monsoon': (6, 8),
+    'autumn': (9, 11),
+    'fall': (9, 11),
+    'winter': (12, 2),
+}
+
+YEAR_ROUND_PHRASES = ('year round', 'year-round', 'all year', 'all season', 'any time', 'anytime')
+
+_WORD = r'[a-z]+'
+_RANGE_RE = re.compile(rf'\b({_WORD})\s*(?:[-–—]|\s(?:to|through|till|until)\s)\s*({_WORD})\b')
+_WORD_RE = re.compile(_WORD)
+# "Mid-March", "late September" -> the month itself
+_QUALIFIER_RE = re.compile(r'\b(?:mid|early|late|end of|beginning of|start of)[\s-]*')
+
+
+def month_bit(month):
+    """Bit for a month number (1-12)."""
+    return 1 << (month - 1)
+
+
+def month_range_mask(start, end):
+    """Mask covering start..end inclusive, wrapping over the new year (e.g. Nov-Feb)."""
+    mask = 0
+    month = start
+    while True:
+        mask |= month_bit(month)
+        if month == end:
+            return mask
+        month = month % 12 + 1
+
+
+def _name_to_range(word):
+    if word in MONTH_NAMES:
+        month = MONTH_NAMES[word]
+        return month, month
+    return SEASON_NAMES.get(word)
+
+
+def parse_season_mask(text):
+    """
+    Normalize a best_season string into a month mask.
+
+    Handles month names and abbreviations, ranges ("March-May", "Nov to Feb"),
+    season names ("Spring", "Autumn") and year-round phrases. Unknown words are
+    ignored, so an unparseable string yields 0 (no season information).
+    """
+    if not text:
+        return 0
+    text = text.lower()
+    if any(phrase in text for phrase in YEAR_ROUND_PHRASES):
+        return ALL_MONTHS
+
+    text = _QUALIFIER_RE.sub('', text)
+    mask = 0
+
+    def consume_range(match):
+        nonlocal mask
+        start, end = _name_to_range(match.group(1)), _name_to_range(match.group(2))
+        if start and end:
+            mask |= month_range_mask(start[0], end[1])
+            return ' '
+        return match.group(0)
+
+    text = _RANGE_RE.sub(consume_range, text)
+    for word in _WORD_RE.findall(text):
+        span = _name_to_range(word)
+        if span:
+            mask |= month_range_mask(*span)
+    return mask
+
+
+def date_range_mask(start, end):
+    """Mask of every month touched by the date range start..end."""
+    if end < start:
+        start, end = end, start
+    if (end.year - start.year) * 12 + end.month - start.month >= 11:
+        return ALL_MONTHS
+    return month_range_mask(start.month, end.month)
+
+
+def mask_to_months(mask):
+    """List of month numbers set in a mask."""
+    return [month for month in range(1, 13) if mask & month_bit(month)]
+
+
+def travel_mask_from_params(params):
+    """
+    Build a month mask from request parameters.
+
+    Accepts `month` (1-12 or a month name) or `start`/`end` ISO dates. Returns 0
+    when no travel period was given and raises ValueError on malformed input.
+    """
+    month = params.get('month', '').strip().lower()
+    if month:
+        if month.isdigit() and 1 <= int(month) <= 12:
+            return month_bit(int(month))
+        if month in MONTH_NAMES:
+            return month_bit(MONTH_NAMES[month])
+        raise ValueError(f'Invalid month: {month}')
+
+    start, end = params.get('start', ''), params.get('end', '')
+    if start or end:
+        start_date = date.fromisoformat(start or end)
+        end_date = date.fromisoformat(end or start)
+        return date_range_mask(start_date, end_date)
+    return 0
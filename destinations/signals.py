@@ -0,0 +1,12 @@
+from heavenknows import images
+from .models import Destination, DestinationImage
+
+# 360 panoramas need their full resolution in the viewer
+PANORAMA_MAX_DIMENSION = 8192
+
+images.normalize_on_upload(Destination, 'cover_image', placeholder_field='cover_image_placeholder')
+images.normalize_on_upload(
+    DestinationImage, 'image',
+    max_dimension=lambda image: PANORAMA_MAX_DIMENSION if image.is_360 else None,
+    placeholder_field='image_placeholder',
+)
@@ -5,6 +5,8 @@ app_name = 'destinations'
 
 urlpatterns = [
     path('', views.DestinationListView.as_view(), name='list'),
+    path('api/season/', views.season_search, name='season_search'),
      path('<slug:slug>/', views.DestinationDetailView.as_view(), name='detail'),
     path('<slug:slug>/generate-itinerary/', views.generate_ai_itinerary, name='generate_itinerary'),
+    path('<slug:slug>/itineraries/<int:days>/', views.itinerary_for_duration, name='itinerary_for_duration'),
 ]
\ No newline at end of file
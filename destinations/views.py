@@ -1,8 +1,11 @@
 from django.shortcuts import render
 
 from django.views.generic import ListView
+from django.http import JsonResponse
+from django.urls import reverse
 from django.db.models import Q
 from .models import Destination, Category, Tag
+from .seasons import MONTH_CHOICES, mask_to_months, travel_mask_from_params
 
 
 class DestinationListView(ListView):
@@ -48,6 +51,15 @@ class DestinationListView(ListView):
         if district:
             queryset = queryset.filter(district__icontains=district)
 
+        # Filter by travel month or date range
+        try:
+            queryset = queryset.in_season(travel_mask_from_params(self.request.GET))
+        except ValueError:
+            pass
+
+        if self.request.GET.get('sort') == 'popular':
+            # Decayed score kept by the refresh_popularity command
+            return queryset.order_by('-popularity', '-id')
         return queryset.order_by('-is_featured', '-created_at')
 
     def get_context_data(self, **kwargs):
@@ -57,6 +69,8 @@ class DestinationListView(ListView):
         context['selected_tag'] = self.request.GET.get('tag', '')
         context['selected_difficulty'] = self.request.GET.get('difficulty', '')
         context['selected_district'] = self.request.GET.get('district', '')
+        context['selected_month'] = self.request.GET.get('month', '')
+        context['selected_sort'] = self.request.GET.get('sort', '')
         
         # Get all categories for chips
         context['categories'] = Category.objects.all()
@@ -72,9 +86,59 @@ class DestinationListView(ListView):
         # Difficulty choices
         context['difficulty_choices'] = Destination.DIFFICULTY_CHOICES
         
+        # Travel month choices
+        context['month_choices'] = MONTH_CHOICES
+        
         return context
 
 
+from django.core.paginator import Paginator
+from django.views.decorators.http import require_GET
+
+
+@require_GET
+def season_search(request):
+    """
+    JSON list of active destinations in season for a travel month or date range.
+    Query params: month=10 (or month=october), or start=2025-10-01&end=2025-11-15.
+    """
+    try:
+        mask = travel_mask_from_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if not mask:
+        return JsonResponse({'success': False, 'error': 'Provide month or start/end dates'}, status=400)
+
+    queryset = Destination.objects.filter(is_active=True).in_season(mask).only(
+        'name', 'slug', 'district', 'province', 'best_season', 'season_mask',
+        'cover_image', 'cover_image_width', 'cover_image_height', 'cover_image_placeholder'
+    ).order_by('-is_featured', '-created_at')
+
+    page = Paginator(queryset, 20).get_page(request.GET.get('page'))
+    return JsonResponse({
+        'success': True,
+        'months': mask_to_months(mask),
+        'page': page.number,
+        'has_next': page.has_next(),
+        'destinations': [
+            {
+                'name': d.name,
+                'slug': d.slug,
+                'district': d.district,
+                'province': d.province,
+                'best_season': d.best_season,
+                'season_months': mask_to_months(d.season_mask),
+                'cover_image': d.cover_image.url if d.cover_image else None,
+                'cover_image_width': d.cover_image_width,
+                'cover_image_height': d.cover_image_height,
+                'cover_image_placeholder': d.cover_image_placeholder,
+                'url': reverse('destinations:detail', args=[d.slug]),
+            }
+            for d in page
+        ],
+    })
+
+
 
 from django.views.generic import DetailView
 from django.http import JsonResponse
@@ -87,6 +151,7 @@ import google.generativeai as genai
 
 from .models import Destination, Itinerary
 from businesses.models import BusinessProfile
+from packages import popularity
 from packages.models import TourPackage
 
 
@@ -111,7 +176,7 @@ class DestinationDetailView(DetailView):
         # Get all itineraries for duration options
         context['all_itineraries'] = destination.itineraries.filter(
             source='ADMIN'
-        ).values('duration_days').distinct()
+        ).values('duration_days').distinct().order_by('duration_days')
         
         # Get 360 images
         context['images_360'] = destination.images.filter(is_360=True)
@@ -127,7 +192,7 @@ class DestinationDetailView(DetailView):
         context['nearby_businesses'] = BusinessProfile.objects.filter(
             district=destination.district,
             is_verified=True
-        ).select_related('user').prefetch_related('images')[:6]
+        ).select_related('user', 'primary_image')[:6]
         
         # Get packages that include this destination
         context['related_packages'] = TourPackage.objects.filter(
@@ -135,12 +200,24 @@ class DestinationDetailView(DetailView):
             status='PUBLISHED'
         ).select_related('travel_business')[:4]
         
-        # Increment view count
-        destination.view_count += 1
-        destination.save(update_fields=['view_count'])
+        # Counted in the next popularity flush
+        popularity.record_view(destination)
         
         return context
 
+from .itineraries import get_itinerary_payloads
+
+
+@require_http_methods(["GET"])
+def itinerary_for_duration(request, slug, days):
+    """Admin itinerary of a destination for the given number of days, as JSON"""
+    destination = get_object_or_404(Destination.objects.only('id'), slug=slug, is_active=True)
+    itinerary = get_itinerary_payloads(destination).get(days)
+    if itinerary is None:
+        return JsonResponse({'success': False, 'error': f'No {days}-day itinerary available'}, status=404)
+    return JsonResponse({'success': True, 'itinerary': itinerary})
+
+
 from decouple import config
 import logging
 # Configure logger
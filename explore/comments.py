@@ -0,0 +1,78 @@
+"""
+Comment threads of explore posts.
+
+Threads are read oldest first in keyset pages on (post, created_at, id),
+which the PostComment composite index serves directly, so any page costs
+the same however long the thread is. Authors are joined in the same query,
+limited to the fields shown. The first page, which is what nearly every
+viewer asks for, is cached until a comment on the post is added or removed.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import PostComment
+
+PAGE_SIZE = 20
+MAX_LENGTH = 2000
+FIRST_PAGE_CACHE_KEY = 'explore:comments:{post_id}'
+FIRST_PAGE_TIMEOUT = 10 * 60
+
+
+def encode_cursor(created_at, pk):
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), pk]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+def serialize(comment):
+    author = comment.author
+    return {
+        'id': comment.id,
+        'author': author.get_full_name() or 'Traveler',
+        'author_picture': author.profile_picture.url if author.profile_picture else None,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+    }
+
+
+def _page(post_id, cursor, limit):
+    queryset = (
+        PostComment.objects.filter(post_id=post_id)
+        .select_related('author')
+        .only('id', 'post_id', 'content', 'created_at',
+              'author__id', 'author__first_name', 'author__last_name', 'author__profile_picture')
+        .order_by('created_at', 'id')
+    )
+    if cursor is not None:
+        created_at, pk = cursor
+        queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+    comments = list(queryset[:limit + 1])
+    has_next = len(comments) > limit
+    comments = comments[:limit]
+    return {
+        'results': [serialize(comment) for comment in comments],
+        'next_cursor': encode_cursor(comments[-1].created_at, comments[-1].id) if has_next else None,
+    }
+
+
+def page(post_id, cursor=None, limit=PAGE_SIZE):
+    """A page of the post's comments after `cursor` (a decoded (created_at, id) pair)."""
+    if cursor is not None or limit != PAGE_SIZE:
+        return _page(post_id, cursor, limit)
+    key = FIRST_PAGE_CACHE_KEY.format(post_id=post_id)
+    first_page = cache.get(key)
+    if first_page is None:
+        first_page = _page(post_id, None, limit)
+        cache.set(key, first_page, FIRST_PAGE_TIMEOUT)
+    return first_page
+
+
+def invalidate_first_page(post_id):
+    cache.delete(FIRST_PAGE_CACHE_KEY.format(post_id=post_id))
@@ -0,0 +1,121 @@
+"""
+Batched engagement counters for explore posts.
+
+Likes and comments are rows of their own; ExplorePost.like_count and
+comment_count are caches of how many there are. Instead of an UPDATE of the
+post row per like (each one a trip through SQLite's write lock), signals add
+the change to an in-process buffer, and a background thread writes the
+summed deltas every COUNTER_FLUSH_SECONDS: one transaction, one F() UPDATE
+per changed post, then the posts are rescored for the feed.
+
+Deltas still buffered when a process dies are lost; the
+reconcile_post_counters command recounts from the rows and fixes any drift.
+With COUNTER_FLUSH_SECONDS = 0 deltas are written immediately.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import feed
+from .models import ExplorePost, PostComment, PostLike
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('like_count', 'comment_count')
+
+_pending = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+_lock = threading.Lock()
+_flusher = None
+
+
+def _interval():
+    return getattr(settings, 'COUNTER_FLUSH_SECONDS', 2)
+
+
+def add(post_id, field, delta):
+    """Buffer a change of one of the post's counters."""
+    with _lock:
+        _pending[post_id][field] += delta
+    if not _interval():
+        flush()
+    else:
+        _start_flusher()
+
+
+def pending(post_id, field):
+    """Change of the counter not written yet by this process."""
+    with _lock:
+        return _pending[post_id][field] if post_id in _pending else 0
+
+
+def flush():
+    """Write all buffered deltas. Returns the number of posts updated."""
+    global _pending
+    with _lock:
+        batch, _pending = _pending, defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    batch = {post_id: deltas for post_id, deltas in batch.items() if any(deltas.values())}
+    if not batch:
+        return 0
+    try:
+        with transaction.atomic():
+            for post_id, deltas in batch.items():
+                ExplorePost.objects.filter(pk=post_id).update(**{
+                    # Never below zero, even if an unlike overtook its like
+                    field: Greatest(F(field) + delta, Value(0))
+                    for field, delta in deltas.items() if delta
+                })
+            feed.refresh_scores(batch)
+    except Exception:
+        # Put the deltas back for the next flush
+        with _lock:
+            for post_id, deltas in batch.items():
+                for field, delta in deltas.items():
+                    _pending[post_id][field] += delta
+        raise
+    return len(batch)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(_interval())
+        try:
+            flush()
+        except Exception:
+            logger.exception('Could not flush post counters')
+        finally:
+            close_old_connections()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_forever, name='post-counters', daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def reconcile():
+    """Recount likes and comments from their rows. Returns the ids of posts that had drifted."""
+    likes = PostLike.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('*')).values('n')
+    comments = PostComment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('*')).values('n')
+    drifted = ExplorePost.objects.annotate(
+        actual_likes=Coalesce(Subquery(likes), 0),
+        actual_comments=Coalesce(Subquery(comments), 0),
+    ).exclude(like_count=F('actual_likes'), comment_count=F('actual_comments'))
+
+    fixed = []
+    for post_id, like_count, comment_count in drifted.values_list('id', 'actual_likes', 'actual_comments').iterator():
+        ExplorePost.objects.filter(pk=post_id).update(like_count=like_count, comment_count=comment_count)
+        fixed.append(post_id)
+    feed.refresh_scores(fixed)
+    return fixed
@@ -0,0 +1,121 @@
+"""
+Ranked explore feed.
+
+Posts are ordered by a "hot" score kept in ExplorePost.hot_score:
+
+    log10(max(1, likes + 2 * comments + views / 10)) + created / DECAY_SECONDS
+
+The age term grows with creation time instead of shrinking with age, so a
+post's score only changes when its own counters do and never has to be
+recomputed as time passes; a post needs ten times the engagement to rank
+level with one DECAY_SECONDS newer. refresh_scores() recomputes the scores
+of posts whose counters changed.
+
+Pages are read with a keyset cursor on (hot_score, id). The ids and scores of
+the top CACHED_POSTS posts are cached for CACHE_TIMEOUT seconds, so pages in
+that range are sliced from the cached list and only the page's rows are
+loaded.
+"""
+import base64
+import bisect
+import json
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import ExplorePost
+
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.1
+DECAY_SECONDS = 45000  # 12.5 hours
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+CACHED_POSTS = 1000
+CACHE_TIMEOUT = 60
+CACHE_KEY = 'explore:feed:{post_type}'
+# Blog bodies are only sent by the post detail endpoint
+LONG_FIELDS = ('content', 'content_html')
+
+
+def hot_score(like_count, comment_count, view_count, created_at):
+    engagement = LIKE_WEIGHT * like_count + COMMENT_WEIGHT * comment_count + VIEW_WEIGHT * view_count
+    return math.log10(max(engagement, 1)) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def refresh_scores(post_ids):
+    """Recompute hot_score for the given posts from their counters."""
+    posts = list(
+        ExplorePost.objects.filter(pk__in=set(post_ids))
+        .only('id', 'like_count', 'comment_count', 'view_count', 'created_at', 'hot_score')
+    )
+    changed = []
+    for post in posts:
+        score = hot_score(post.like_count, post.comment_count, post.view_count, post.created_at)
+        if score != post.hot_score:
+            post.hot_score = score
+            changed.append(post)
+    ExplorePost.objects.bulk_update(changed, ['hot_score'], batch_size=500)
+
+
+def encode_cursor(score, pk):
+    return base64.urlsafe_b64encode(json.dumps([score, pk]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    score, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(score), int(pk)
+
+
+def _feed_queryset(post_type=None):
+    queryset = ExplorePost.objects.filter(is_approved=True)
+    if post_type:
+        queryset = queryset.filter(post_type=post_type)
+    return queryset.order_by('-hot_score', '-id')
+
+
+def _ranked(post_type=None):
+    """(hot_score, id) of the top posts, best first, cached briefly."""
+    key = CACHE_KEY.format(post_type=post_type or 'all')
+    ranked = cache.get(key)
+    if ranked is None:
+        ranked = list(_feed_queryset(post_type).values_list('hot_score', 'id')[:CACHED_POSTS])
+        cache.set(key, ranked, CACHE_TIMEOUT)
+    return ranked
+
+
+def page(post_type=None, cursor=None, limit=20):
+    """
+    One page of the feed after `cursor` (a decoded (score, id) pair).
+    Returns (posts, next_cursor).
+    """
+    ranked = _ranked(post_type)
+    start = 0
+    if cursor is not None:
+        score, pk = cursor
+        # The list is in descending (score, id) order, i.e. ascending negated keys
+        start = bisect.bisect_right(ranked, (-score, -pk), key=lambda entry: (-entry[0], -entry[1]))
+
+    if start + limit < len(ranked) or len(ranked) < CACHED_POSTS:
+        keys = ranked[start:start + limit + 1]
+        posts_by_id = _feed_queryset(post_type).select_related('author', 'destination').defer(*LONG_FIELDS).in_bulk(
+            [pk for _, pk in keys[:limit]]
+        )
+        # Posts unapproved since the list was cached are skipped
+        posts = [posts_by_id[pk] for _, pk in keys[:limit] if pk in posts_by_id]
+        has_next = len(keys) > limit
+        last = keys[limit - 1] if has_next else None
+    else:
+        # Past the cached range: keyset query on the (hot_score, id) index
+        queryset = _feed_queryset(post_type).select_related('author', 'destination').defer(*LONG_FIELDS)
+        if cursor is not None:
+            score, pk = cursor
+            queryset = queryset.filter(Q(hot_score__lt=score) | Q(hot_score=score, id__lt=pk))
+        posts = list(queryset[:limit + 1])
+        has_next = len(posts) > limit
+        posts = posts[:limit]
+        last = (posts[-1].hot_score, posts[-1].id) if has_next else None
+
+    return posts, encode_cursor(*last) if last else None
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from explore import uploads
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned video uploads and their temporary files"
+
+    def handle(self, *args, **options):
+        deleted = uploads.purge()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idle video uploads"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from explore import counters
+
+
+class Command(BaseCommand):
+    help = "Recount explore post likes and comments and fix counters that drifted"
+
+    def handle(self, *args, **options):
+        counters.flush()
+        fixed = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Fixed counters of {len(fixed)} posts"))
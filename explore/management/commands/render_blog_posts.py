@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from explore import rendering
+from explore.models import RENDERED_FIELDS, ExplorePost
+
+
+class Command(BaseCommand):
+    help = "Re-render blog content of posts rendered by an older renderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-render every post")
+
+    def handle(self, *args, **options):
+        queryset = ExplorePost.objects.exclude(content='')
+        if not options['all']:
+            queryset = queryset.filter(renderer_version__lt=rendering.RENDERER_VERSION)
+
+        rendered = changed = 0
+        for post in queryset.only('id', 'content', *RENDERED_FIELDS).iterator(chunk_size=200):
+            changed += post.render_content()
+            # Straight to the table: a save() would render again
+            ExplorePost.objects.filter(pk=post.pk).update(**{field: getattr(post, field) for field in RENDERED_FIELDS})
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} posts, {changed} with changed HTML"))
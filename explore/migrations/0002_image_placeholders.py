@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:34
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='explorepost',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='thumbnail_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='thumbnail_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='thumbnail_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='explorepost',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', null=True, upload_to='explore/photos/', validators=[heavenknows.images.validate_image_upload], width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='explorepost',
+            name='thumbnail',
+            field=models.ImageField(blank=True, height_field='thumbnail_height', null=True, upload_to='explore/thumbnails/', validators=[heavenknows.images.validate_image_upload], width_field='thumbnail_width'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:39
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+# Copied from explore.feed as of this migration, so later changes there do
+# not change (or break) this backfill
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.1
+DECAY_SECONDS = 45000
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def hot_score(like_count, comment_count, view_count, created_at):
+    engagement = LIKE_WEIGHT * like_count + COMMENT_WEIGHT * comment_count + VIEW_WEIGHT * view_count
+    return math.log10(max(engagement, 1)) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def backfill_scores(apps, schema_editor):
+    ExplorePost = apps.get_model('explore', 'ExplorePost')
+    posts = list(ExplorePost.objects.annotate(comments_total=Count('comments')))
+    for post in posts:
+        post.comment_count = post.comments_total
+        post.hot_score = hot_score(post.like_count, post.comment_count, post.view_count, post.created_at)
+    ExplorePost.objects.bulk_update(posts, ['comment_count', 'hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0006_image_placeholders'),
+        ('explore', '0003_video_uploads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='explorepost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='explorepost',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['-hot_score', '-id'], name='explore_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='explorepost',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['post_type', '-hot_score', '-id'], name='explore_feed_type_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:42
+
+import math
+
+from django.db import migrations, models
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+
+def render_existing_posts(apps, schema_editor):
+    """
+    Store a text-only rendering of existing posts: escaped paragraphs with
+    all markup removed. It is self-contained, so later changes to
+    explore.rendering cannot affect this migration. renderer_version stays 0,
+    so the render_blog_posts command replaces it with the full rendering.
+    """
+    ExplorePost = apps.get_model('explore', 'ExplorePost')
+    posts = list(ExplorePost.objects.exclude(content=''))
+    for post in posts:
+        text = strip_tags(post.content).strip()
+        words = text.split()
+        post.content_html = linebreaks(text, autoescape=True) if text else ''
+        post.excerpt = Truncator(' '.join(words)).chars(200)
+        post.reading_time = max(1, math.ceil(len(words) / 200)) if words else 0
+        post.content_version = 1
+        post.renderer_version = 0
+    ExplorePost.objects.bulk_update(
+        posts, ['content_html', 'excerpt', 'reading_time', 'content_version', 'renderer_version'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0005_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='explorepost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='explorepost',
+            name='renderer_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:57
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0006_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='explorepost',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='explore/photos/', validators=[heavenknows.images.validate_image_upload]),
+        ),
+        migrations.AlterField(
+            model_name='explorepost',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='explore/thumbnails/', validators=[heavenknows.images.validate_image_upload]),
+        ),
+    ]
@@ -1,6 +1,13 @@
+import uuid
+
 from django.db import models
 from accounts.models import CustomUser
 from destinations.models import Destination
+from heavenknows.images import validate_image_upload
+from . import rendering
+
+
+RENDERED_FIELDS = ('content_html', 'excerpt', 'reading_time', 'content_version', 'renderer_version')
 
 
 class ExplorePost(models.Model):
@@ -22,15 +29,33 @@ class ExplorePost(models.Model):
     caption = models.TextField(blank=True)
     
     # For photos
-    image = models.ImageField(upload_to='explore/photos/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='explore/photos/', blank=True, null=True, validators=[validate_image_upload],
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Tiny preview shown while the image loads (data URI)
+    image_placeholder = models.TextField(blank=True, editable=False)
     
     # For videos
     video = models.FileField(upload_to='explore/videos/', blank=True, null=True)
     video_url = models.URLField(blank=True, null=True)  # For YouTube, Vimeo links
-    thumbnail = models.ImageField(upload_to='explore/thumbnails/', blank=True, null=True)
+    thumbnail = models.ImageField(
+        upload_to='explore/thumbnails/', blank=True, null=True, validators=[validate_image_upload],
+    )
+    thumbnail_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    thumbnail_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    thumbnail_placeholder = models.TextField(blank=True, editable=False)
     
     # For blogs
     content = models.TextField(blank=True)  # Rich text content for blogs
+    # Rendered from content on save (see explore/rendering.py)
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=255, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)  # minutes
+    # Goes up whenever content_html changes; key cached renders on it
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+    renderer_version = models.PositiveSmallIntegerField(default=0, editable=False)
     
     # Relations
     destination = models.ForeignKey(Destination, on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
@@ -38,6 +63,9 @@ class ExplorePost(models.Model):
     # Engagement
     view_count = models.PositiveIntegerField(default=0)
     like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Feed rank from the counters and creation time (see explore/feed.py)
+    hot_score = models.FloatField(default=0, editable=False)
     
     # Moderation
     is_approved = models.BooleanField(default=True)  # Can be reviewed by admin
@@ -48,10 +76,34 @@ class ExplorePost(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-hot_score', '-id'], condition=models.Q(is_approved=True),
+                         name='explore_feed_idx'),
+            models.Index(fields=['post_type', '-hot_score', '-id'], condition=models.Q(is_approved=True),
+                         name='explore_feed_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_post_type_display()}: {self.title} by {self.author.email}"
 
+    def render_content(self):
+        """Render content into the stored HTML fields. Returns True if the HTML changed."""
+        html, self.excerpt, self.reading_time = rendering.render(self.content)
+        self.renderer_version = rendering.RENDERER_VERSION
+        if html == self.content_html:
+            return False
+        self.content_html = html
+        self.content_version += 1
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(RENDERED_FIELDS)
+        super().save(*args, **kwargs)
+
 
 class PostLike(models.Model):
     """
@@ -81,6 +133,43 @@ class PostComment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pages of a post's thread (see explore/comments.py)
+            models.Index(fields=['post', 'created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author.email} on {self.post.title}"
+
+
+class VideoUpload(models.Model):
+    """
+    A resumable, chunked upload of an explore post's video.
+    Chunks are written to a temporary file (see explore/uploads.py) until
+    `offset` reaches `size`; completing the upload attaches it to the post.
+    """
+
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('COMPLETE', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='video_uploads')
+    post = models.ForeignKey(ExplorePost, on_delete=models.CASCADE, related_name='video_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # Bytes received so far; the next chunk must start here
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
 
     def __str__(self):
-        return f"Comment by {self.author.email} on {self.post.title}"
\ No newline at end of file
+        return f"Upload of {self.filename} ({self.offset}/{self.size} bytes)"
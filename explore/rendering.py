@@ -0,0 +1,158 @@
+"""
+Blog post rendering.
+
+ExplorePost.content is rendered once, when the post is saved, into
+content_html together with an excerpt and a reading time, so feed and detail
+views only read stored columns. Content containing markup is treated as HTML
+from the editor and rebuilt from an allowlist: only the tags, attributes and
+URL schemes below are written back out, everything else is dropped (script
+and style elements with their contents) and all text is escaped. Plain text
+is split into paragraphs.
+
+ExplorePost.content_version goes up whenever content_html changes, so
+anything cached from a render can be keyed on it. RENDERER_VERSION is bumped
+when this module's output changes; the render_blog_posts command then
+re-renders stored posts.
+"""
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+RENDERER_VERSION = 1
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'strong', 'b', 'em', 'i', 'u', 's', 'blockquote', 'code', 'pre',
+    'ul', 'ol', 'li', 'h2', 'h3', 'h4', 'a', 'img', 'figure', 'figcaption',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+}
+# Tags whose contents are dropped along with the tag
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'svg', 'math', 'head', 'title'}
+RENAMED_TAGS = {'h1': 'h2', 'h5': 'h4', 'h6': 'h4'}
+VOID_TAGS = {'br', 'hr', 'img'}
+BLOCK_TAGS = {'p', 'blockquote', 'pre', 'ul', 'ol', 'li', 'h2', 'h3', 'h4', 'figure', 'figcaption', 'br', 'hr'}
+URL_SCHEMES = {'a': ('http', 'https', 'mailto'), 'img': ('http', 'https')}
+
+# A complete tag or comment; a stray '<' in plain text is not markup
+_MARKUP_RE = re.compile(r'<(?:/?[a-zA-Z][a-zA-Z0-9]*(?:\s[^<>]*)?/?|!--.*?--)>', re.DOTALL)
+_SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+_CONTROL_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def _safe_url(tag, url):
+    url = _CONTROL_RE.sub('', url or '')
+    match = _SCHEME_RE.match(url)
+    if match is None:
+        # Relative URL; '//' would switch host and scheme
+        return url if url and not url.startswith('//') else None
+    return url if match.group(1).lower() in URL_SCHEMES[tag] else None
+
+
+class _Sanitizer(HTMLParser):
+    """Re-serializes parsed HTML, keeping only allowlisted markup."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        tag = RENAMED_TAGS.get(tag, tag)
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        kept = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in ('href', 'src'):
+                value = _safe_url(tag, value)
+                if value is None:
+                    continue
+            elif name in ('width', 'height') and not value.isdigit():
+                continue
+            kept.append((name, value))
+        if tag == 'img':
+            if not any(name == 'src' for name, _ in kept):
+                return
+            kept.append(('loading', 'lazy'))
+        elif tag == 'a':
+            kept.append(('rel', 'nofollow noopener noreferrer'))
+
+        self.output.append('<' + tag + ''.join(f' {name}="{escape(value)}"' for name, value in kept) + '>')
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            # Nothing inside to drop
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and RENAMED_TAGS.get(tag, tag) in self.open_tags[-1:]:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        tag = RENAMED_TAGS.get(tag, tag)
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside this element first
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.output.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.output.append(f'</{self.open_tags.pop()}>')
+
+
+def sanitize(markup):
+    """(safe HTML, plain text) of untrusted HTML."""
+    parser = _Sanitizer()
+    parser.feed(markup)
+    parser.close()
+    return ''.join(parser.output), ''.join(parser.text)
+
+
+def render(content):
+    """Render blog content. Returns (html, excerpt, reading time in minutes)."""
+    content = (content or '').strip()
+    if not content:
+        return '', '', 0
+    if _MARKUP_RE.search(content):
+        html, text = sanitize(content)
+    else:
+        html, text = linebreaks(content, autoescape=True), content
+
+    words = text.split()
+    excerpt = Truncator(' '.join(words)).chars(EXCERPT_LENGTH)
+    return html, excerpt, max(1, math.ceil(len(words) / WORDS_PER_MINUTE))
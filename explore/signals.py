@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from heavenknows import images
+from . import comments, counters, feed
+from .models import ExplorePost, PostComment, PostLike
+
+images.normalize_on_upload(ExplorePost, 'image', placeholder_field='image_placeholder')
+images.normalize_on_upload(ExplorePost, 'thumbnail', placeholder_field='thumbnail_placeholder')
+
+
+@receiver(post_save, sender=ExplorePost)
+def score_new_post(sender, instance, created, **kwargs):
+    if created:
+        feed.refresh_scores([instance.pk])
+
+
+# Counted once the like or comment is committed, so rolled back ones never are
+
+@receiver(post_save, sender=PostLike)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: counters.add(instance.post_id, 'like_count', 1))
+
+
+@receiver(post_delete, sender=PostLike)
+def uncount_like(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counters.add(instance.post_id, 'like_count', -1))
+
+
+@receiver(post_save, sender=PostComment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: counters.add(instance.post_id, 'comment_count', 1))
+
+
+@receiver(post_delete, sender=PostComment)
+def uncount_comment(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counters.add(instance.post_id, 'comment_count', -1))
+
+
+@receiver(post_save, sender=PostComment)
+@receiver(post_delete, sender=PostComment)
+def refresh_first_comment_page(sender, instance, **kwargs):
+    transaction.on_commit(lambda: comments.invalidate_first_page(instance.post_id))
@@ -0,0 +1,180 @@
+"""
+Resumable chunked uploads of explore videos.
+
+A client starts an upload with the file's name, size and SHA-256, then sends
+it in chunks, each one carrying the offset it starts at. Chunks are copied
+from the request stream straight into a temporary file at that offset, a
+buffer at a time, so memory use does not grow with the file. After a dropout
+the client asks for the upload's offset and carries on from there; bytes of
+an interrupted chunk that did arrive are kept. Completing the upload checks
+the size and checksum, stores the file through ExplorePost.video and removes
+the temporary file. Uploads idle for longer than UPLOAD_TTL are deleted by
+the purge_video_uploads command.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExplorePost, VideoUpload
+
+# Largest chunk accepted in one request
+CHUNK_SIZE = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+UPLOAD_TTL = timedelta(hours=24)
+ALLOWED_EXTENSIONS = {'.mp4', '.m4v', '.mov', '.webm'}
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, offset):
+        self.offset = offset
+        super().__init__(f'The upload continues at byte {offset}.')
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def temp_dir():
+    return getattr(settings, 'VIDEO_UPLOAD_TEMP_DIR', os.path.join(settings.BASE_DIR, 'upload_chunks'))
+
+
+def temp_path(upload_id):
+    return os.path.join(temp_dir(), f'{upload_id}.part')
+
+
+def start(user, post_id, filename, size, sha256):
+    """Create an upload for one of the user's posts. Raises ValueError for bad input."""
+    filename = os.path.basename(str(filename or '')).strip()
+    if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        raise ValueError('Upload an MP4, MOV or WebM video.')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError('Give the file size in bytes.')
+    max_size = getattr(settings, 'VIDEO_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+    if not 0 < size <= max_size:
+        raise ValueError(f'Videos can be at most {max_size // 1024 ** 2} MB.')
+    sha256 = str(sha256 or '').strip().lower()
+    if len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256):
+        raise ValueError('Give the SHA-256 of the file as 64 hex digits.')
+    post = ExplorePost.objects.filter(pk=post_id, author=user).only('id').first()
+    if post is None:
+        raise ValueError('Unknown post.')
+
+    upload = VideoUpload.objects.create(user=user, post=post, filename=filename, size=size, sha256=sha256)
+    os.makedirs(temp_dir(), exist_ok=True)
+    # Create the file up front so appends can open it for writing in place
+    open(temp_path(upload.id), 'xb').close()
+    return upload
+
+
+def append(upload, stream, start_offset, length):
+    """
+    Write `length` bytes from `stream` at `start_offset` and advance the
+    upload's offset by what arrived. Returns the new offset.
+    """
+    if upload.status != 'ACTIVE' or start_offset != upload.offset:
+        raise OffsetMismatch(upload.offset)
+    if length > min(CHUNK_SIZE, upload.size - start_offset):
+        raise ValueError(f'Chunks can be at most {CHUNK_SIZE} bytes and must not run past the file size.')
+
+    received = 0
+    try:
+        with open(temp_path(upload.id), 'r+b') as f:
+            f.seek(start_offset)
+            while received < length:
+                data = stream.read(min(READ_SIZE, length - received))
+                if not data:
+                    break
+                f.write(data)
+                received += len(data)
+    except OSError:
+        # Client went away mid-chunk; keep what was written
+        pass
+
+    new_offset = start_offset + received
+    # Only advances from the offset this chunk started at, so a concurrent
+    # retry of the same chunk cannot count its bytes twice
+    updated = VideoUpload.objects.filter(pk=upload.pk, status='ACTIVE', offset=start_offset).update(
+        offset=new_offset, updated_at=timezone.now()
+    )
+    if not updated:
+        upload.refresh_from_db(fields=['offset'])
+        raise OffsetMismatch(upload.offset)
+    upload.offset = new_offset
+    return new_offset
+
+
+def _file_sha256(f):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(READ_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def complete(upload):
+    """Verify the received file and attach it to the post. Returns the stored name."""
+    if upload.status == 'COMPLETE':
+        return upload.post.video.name
+    if upload.offset != upload.size:
+        raise OffsetMismatch(upload.offset)
+
+    path = temp_path(upload.id)
+    post = upload.post
+    field = post._meta.get_field('video')
+    with open(path, 'r+b') as f:
+        # Drop bytes of interrupted chunks written past the final offset
+        f.truncate(upload.size)
+        matches = _file_sha256(f) == upload.sha256
+        if matches:
+            f.seek(0)
+            name = field.storage.save(field.generate_filename(post, upload.filename), File(f))
+    if not matches:
+        os.remove(path)
+        upload.delete()
+        raise ChecksumMismatch('The uploaded file does not match its checksum. Start the upload again.')
+
+    with transaction.atomic():
+        updated = VideoUpload.objects.filter(pk=upload.pk, status='ACTIVE').update(
+            status='COMPLETE', updated_at=timezone.now()
+        )
+        if not updated:
+            # Completed concurrently; keep that result
+            field.storage.delete(name)
+            upload.refresh_from_db()
+            return upload.post.video.name
+        old_name = ExplorePost.objects.filter(pk=post.pk).values_list('video', flat=True).first()
+        ExplorePost.objects.filter(pk=post.pk).update(video=name)
+        if old_name and old_name != name:
+            transaction.on_commit(lambda: field.storage.delete(old_name))
+
+    upload.status = 'COMPLETE'
+    os.remove(path)
+    return name
+
+
+def purge(now=None):
+    """Delete uploads idle for longer than UPLOAD_TTL and their temporary files."""
+    cutoff = (now or timezone.now()) - UPLOAD_TTL
+    stale = VideoUpload.objects.filter(updated_at__lt=cutoff)
+    removed = 0
+    for upload_id in stale.values_list('id', flat=True).iterator():
+        try:
+            os.remove(temp_path(upload_id))
+        except FileNotFoundError:
+            pass
+        removed += 1
+    stale.delete()
+
+    # Files whose upload row is gone (e.g. deleted with its post)
+    known = {f'{upload_id}.part' for upload_id in VideoUpload.objects.values_list('id', flat=True)}
+    if os.path.isdir(temp_dir()):
+        for entry in os.scandir(temp_dir()):
+            if entry.name.endswith('.part') and entry.name not in known and entry.stat().st_mtime < cutoff.timestamp():
+                os.remove(entry.path)
+    return removed
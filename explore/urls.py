@@ -5,4 +5,12 @@ app_name = 'explore'
 
 urlpatterns = [
     path('', views.IndexView.as_view(), name='index'),
+    path('explore/api/feed/', views.explore_feed, name='feed'),
+    path('explore/api/posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('explore/api/posts/<int:post_id>/like/', views.like_post, name='like_post'),
+    path('explore/api/posts/<int:post_id>/comments/', views.post_comments, name='post_comments'),
+    path('explore/uploads/videos/', views.start_video_upload, name='start_video_upload'),
+    path('explore/uploads/videos/<uuid:upload_id>/', views.video_upload, name='video_upload'),
+    path('explore/uploads/videos/<uuid:upload_id>/complete/', views.complete_video_upload,
+         name='complete_video_upload'),
 ]
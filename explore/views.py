@@ -1,6 +1,247 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
+from destinations.recommendations import recommended_for
+
 
 class IndexView(TemplateView):
     template_name = 'explore/explore.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['recommended_destinations'] = recommended_for(self.request.user)
+        return context
+
+
+# ============= Resumable video uploads =============
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from . import uploads
+from .models import VideoUpload
+
+
+def _upload_state(upload):
+    return {
+        'success': True,
+        'upload_id': str(upload.id),
+        'offset': upload.offset,
+        'size': upload.size,
+        'status': upload.status,
+        'chunk_size': uploads.CHUNK_SIZE,
+    }
+
+
+@require_POST
+def start_video_upload(request):
+    """
+    Start a resumable upload of a post's video. POST params: post (id of one
+    of the user's posts), filename, size (bytes), sha256 (hex digest of the
+    whole file). Chunks are then sent to the returned upload.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+    try:
+        upload = uploads.start(
+            request.user, request.POST.get('post'), request.POST.get('filename'),
+            request.POST.get('size'), request.POST.get('sha256'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse(_upload_state(upload), status=201)
+
+
+@require_http_methods(['GET', 'PATCH'])
+def video_upload(request, upload_id):
+    """
+    GET: the upload's offset, to resume from after a dropout.
+    PATCH: append the raw request body (application/octet-stream) at the
+    offset given in the Upload-Offset header.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+    upload = get_object_or_404(VideoUpload, pk=upload_id, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_upload_state(upload))
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.headers.get('Content-Length', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Upload-Offset and Content-Length are required'}, status=400)
+    try:
+        # Reads the body from the request stream; request.body is never loaded
+        uploads.append(upload, request, offset, length)
+    except uploads.OffsetMismatch as e:
+        return JsonResponse({'success': False, 'error': str(e), 'offset': e.offset}, status=409)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=413)
+    return JsonResponse(_upload_state(upload))
+
+
+@require_POST
+def complete_video_upload(request, upload_id):
+    """Check the uploaded file against its size and checksum and attach it to the post."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+    upload = get_object_or_404(VideoUpload.objects.select_related('post'), pk=upload_id, user=request.user)
+    try:
+        name = uploads.complete(upload)
+    except uploads.OffsetMismatch as e:
+        return JsonResponse({'success': False, 'error': 'The upload is not finished.', 'offset': e.offset}, status=409)
+    except uploads.ChecksumMismatch as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=422)
+    return JsonResponse({**_upload_state(upload), 'video': upload.post.video.storage.url(name)})
+
+
+# ============= Feed =============
+
+from . import feed
+from .models import ExplorePost
+
+
+def _image(field, width, height, placeholder):
+    if not field:
+        return None
+    return {'url': field.url, 'width': width, 'height': height, 'placeholder': placeholder}
+
+
+@require_GET
+def explore_feed(request):
+    """
+    Approved posts, hottest first. Query params: type (PHOTO, VIDEO or BLOG),
+    cursor (from next_cursor), limit (max 50).
+    """
+    post_type = request.GET.get('type') or None
+    if post_type and post_type not in dict(ExplorePost.POST_TYPE_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Unknown post type'}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 50))
+    except ValueError:
+        limit = 20
+    cursor = request.GET.get('cursor')
+    try:
+        cursor = feed.decode_cursor(cursor) if cursor else None
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    posts, next_cursor = feed.page(post_type, cursor, limit)
+    return JsonResponse({
+        'success': True,
+        'results': [_post_summary(post) for post in posts],
+        'next_cursor': next_cursor,
+    })
+
+
+def _post_summary(post):
+    return {
+        'id': post.id,
+        'type': post.post_type,
+        'title': post.title,
+        'caption': post.caption,
+        # Never the email address; it is not public
+        'author': post.author.get_full_name() or 'Traveler',
+        'image': _image(post.image, post.image_width, post.image_height, post.image_placeholder),
+        'thumbnail': _image(post.thumbnail, post.thumbnail_width, post.thumbnail_height,
+                            post.thumbnail_placeholder),
+        'video': post.video.url if post.video else post.video_url,
+        'destination': post.destination.name if post.destination else None,
+        'like_count': post.like_count,
+        'comment_count': post.comment_count,
+        'view_count': post.view_count,
+        'excerpt': post.excerpt,
+        'reading_time': post.reading_time,
+        'created_at': post.created_at.isoformat(),
+    }
+
+
+@require_GET
+def post_detail(request, post_id):
+    """An approved post with its rendered blog content."""
+    post = get_object_or_404(
+        ExplorePost.objects.select_related('author', 'destination').defer('content'), pk=post_id, is_approved=True
+    )
+    return JsonResponse({
+        'success': True,
+        'post': {
+            **_post_summary(post),
+            'content_html': post.content_html,
+            'content_version': post.content_version,
+        },
+    })
+
+
+# ============= Likes =============
+
+from django.db import IntegrityError, transaction
+from . import counters
+from .models import PostLike
+
+
+@require_http_methods(['POST', 'DELETE'])
+def like_post(request, post_id):
+    """POST likes the post, DELETE takes the like back; repeating either changes nothing."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+    post = get_object_or_404(ExplorePost.objects.only('id', 'like_count'), pk=post_id, is_approved=True)
+
+    if request.method == 'POST':
+        try:
+            with transaction.atomic():
+                PostLike.objects.create(post=post, user=request.user)
+        except IntegrityError:
+            pass  # Already liked
+        liked = True
+    else:
+        PostLike.objects.filter(post=post, user=request.user).delete()
+        liked = False
+
+    # The like may have been flushed since the post was loaded (always, with
+    # COUNTER_FLUSH_SECONDS = 0), so read the stored count after the write
+    post.refresh_from_db(fields=['like_count'])
+    return JsonResponse({
+        'success': True,
+        'liked': liked,
+        'like_count': max(post.like_count + counters.pending(post.id, 'like_count'), 0),
+    })
+
+
+# ============= Comments =============
+
+from . import comments
+from .models import PostComment
+
+
+@require_http_methods(['GET', 'POST'])
+def post_comments(request, post_id):
+    """
+    GET: the post's comments, oldest first. Query params: cursor (from
+    next_cursor), limit (max 50).
+    POST: add a comment. POST params: content.
+    """
+    post = get_object_or_404(ExplorePost.objects.only('id'), pk=post_id, is_approved=True)
+
+    if request.method == 'POST':
+        if not request.user.is_authenticated:
+            return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+        content = request.POST.get('content', '').strip()
+        if not content:
+            return JsonResponse({'success': False, 'error': 'Write a comment first'}, status=400)
+        if len(content) > comments.MAX_LENGTH:
+            return JsonResponse({
+                'success': False, 'error': f'Comments can be at most {comments.MAX_LENGTH} characters'
+            }, status=400)
+        comment = PostComment.objects.create(post=post, author=request.user, content=content)
+        return JsonResponse({'success': True, 'comment': comments.serialize(comment)}, status=201)
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', comments.PAGE_SIZE)), 50))
+    except ValueError:
+        limit = comments.PAGE_SIZE
+    cursor = request.GET.get('cursor')
+    try:
+        cursor = comments.decode_cursor(cursor) if cursor else None
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({'success': True, **comments.page(post.id, cursor, limit)})
@@ -0,0 +1,238 @@
+"""
+Upload-time image normalization.
+
+New uploads to registered ImageFields are validated with Pillow when the
+form is cleaned (stored files are not reopened), and after the upload is
+committed a worker thread re-encodes them: EXIF orientation is applied,
+dimensions are capped, metadata is dropped and the result is saved as a
+progressive JPEG (or WebP for images with transparency), even when that is
+larger than the upload. Animations are kept as uploaded. The field is then
+pointed at the new file with a conditional UPDATE, so a newer upload in the
+meantime wins. With IMAGE_KEEP_ORIGINALS the untouched upload is kept under
+originals/.
+
+The same UPDATE stores the final width and height in the model's
+<field>_width and <field>_height columns and, when registered with a
+placeholder_field, a tiny WebP preview as a data URI, so list templates can
+reserve the image's box and paint a blurred preview without another request.
+The columns are plain integers rather than the ImageField's width_field/
+height_field, which would open and decode the file on every model load while
+they are empty; until an image is described they are NULL, i.e. unknown.
+
+Settings: IMAGE_MAX_DIMENSION (default 2048), IMAGE_JPEG_QUALITY (82),
+IMAGE_WEBP_QUALITY (80), IMAGE_KEEP_ORIGINALS (False), IMAGE_WORKERS (2;
+0 runs the work inline after commit, e.g. for tests).
+"""
+import base64
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save, pre_save
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'MPO'}
+# Larger uploads are rejected instead of decoded (about 12000 x 8000)
+MAX_PIXELS = 100_000_000
+# Longest side of the preview; the browser's upscaling does the blurring
+PLACEHOLDER_SIZE = 16
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def validate_image_upload(file):
+    """Reject files Pillow cannot read, unexpected formats and decompression bombs."""
+    if getattr(file, '_committed', False):
+        # Already stored and checked when it was uploaded
+        return
+    position = file.tell() if hasattr(file, 'tell') else None
+    try:
+        with Image.open(file) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise ValidationError('Upload a JPEG, PNG, WebP or GIF image.')
+            if image.width * image.height > MAX_PIXELS:
+                raise ValidationError('This image is too large.')
+            image.verify()
+    except ValidationError:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise ValidationError('Upload a valid image. The file is not an image or is corrupted.')
+    finally:
+        if position is not None:
+            file.seek(position)
+
+
+def normalize_image(data, max_dimension=None):
+    """
+    Re-encode image bytes without their metadata. Returns (bytes, extension),
+    or None for animations, which are kept as uploaded.
+    """
+    max_dimension = max_dimension or _setting('IMAGE_MAX_DIMENSION', 2048)
+    with Image.open(io.BytesIO(data)) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+        image.load()
+        # Bake in the EXIF orientation, since the EXIF block is dropped below
+        image = ImageOps.exif_transpose(image)
+        if max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        has_alpha = _has_alpha(image)
+        output = io.BytesIO()
+        if has_alpha:
+            image.convert('RGBA').save(
+                output, 'WEBP', quality=_setting('IMAGE_WEBP_QUALITY', 80), method=6
+            )
+            extension = '.webp'
+        else:
+            image.convert('RGB').save(
+                output, 'JPEG', quality=_setting('IMAGE_JPEG_QUALITY', 82),
+                optimize=True, progressive=True,
+            )
+            extension = '.jpg'
+
+    # Written even when larger than the upload: the EXIF block (GPS position,
+    # orientation) must not survive
+    return output.getvalue(), extension
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def describe_image(data):
+    """(width, height, placeholder data URI) of image bytes, as browsers display them."""
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8):
+            # Rotated a quarter turn on display
+            width, height = height, width
+        # Lets JPEGs decode at a fraction of their size
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        preview = ImageOps.exif_transpose(image)
+        preview = preview.convert('RGBA' if _has_alpha(preview) else 'RGB')
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    preview.save(output, 'WEBP', quality=40)
+    return width, height, 'data:image/webp;base64,' + base64.b64encode(output.getvalue()).decode()
+
+
+def dimension_fields(model, field_name, width=None, height=None):
+    """((name, value), ...) for the model's <field>_width/<field>_height columns that exist."""
+    names = {field.name for field in model._meta.get_fields()}
+    return [
+        (name, value) for name, value in ((f'{field_name}_width', width), (f'{field_name}_height', height))
+        if name in names
+    ]
+
+
+def describe_updates(model, field_name, data, placeholder_field=None):
+    """Field values describing image bytes, for a queryset update."""
+    width, height, placeholder = describe_image(data)
+    updates = dict(dimension_fields(model, field_name, width, height))
+    if placeholder_field:
+        updates[placeholder_field] = placeholder
+    return updates
+
+
+def _normalize_stored(model, pk, field_name, name, max_dimension, placeholder_field=None):
+    field = model._meta.get_field(field_name)
+    storage = field.storage
+    try:
+        with storage.open(name, 'rb') as f:
+            data = f.read()
+        result = normalize_image(data, max_dimension)
+        if result is None:
+            content, new_name = data, name
+        else:
+            content, extension = result
+            new_name = storage.save(os.path.splitext(name)[0] + extension, ContentFile(content))
+
+        updates = describe_updates(model, field_name, content, placeholder_field)
+        updates[field_name] = new_name
+        updated = model._default_manager.filter(pk=pk, **{field_name: name}).update(**updates)
+        if not updated:
+            # Deleted or re-uploaded meanwhile
+            if new_name != name:
+                storage.delete(new_name)
+            return
+        if new_name == name:
+            return
+        if _setting('IMAGE_KEEP_ORIGINALS', False):
+            storage.save(f'originals/{name}', ContentFile(data))
+        storage.delete(name)
+        logger.info('Normalized %s: %d -> %d bytes', name, len(data), len(content))
+    except Exception:
+        logger.exception('Could not normalize image %s', name)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+# (model, field_name, placeholder_field) for every registered field
+registered_fields = []
+
+
+def _run(*args):
+    try:
+        _normalize_stored(*args)
+    finally:
+        close_old_connections()
+
+
+def schedule(model, pk, field_name, name, max_dimension=None, placeholder_field=None):
+    """Normalize and describe a committed upload in the worker pool."""
+    global _executor
+    workers = _setting('IMAGE_WORKERS', 2)
+    if not workers:
+        _normalize_stored(model, pk, field_name, name, max_dimension, placeholder_field)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-normalize')
+    _executor.submit(_run, model, pk, field_name, name, max_dimension, placeholder_field)
+
+
+def normalize_on_upload(model, field_name, max_dimension=None, placeholder_field=None):
+    """
+    Normalize new uploads of model.field_name after they are committed.
+    max_dimension may be a callable taking the instance. placeholder_field
+    names the field receiving the preview data URI.
+    """
+    registered_fields.append((model, field_name, placeholder_field))
+
+    def remember_upload(sender, instance, **kwargs):
+        file = getattr(instance, field_name)
+        pending = instance.__dict__.setdefault('_pending_image_uploads', set())
+        if file and not file._committed:
+            pending.add(field_name)
+        if not file or not file._committed:
+            # Unknown until the new upload is described
+            for name, value in dimension_fields(sender, field_name):
+                setattr(instance, name, value)
+            if placeholder_field:
+                setattr(instance, placeholder_field, '')
+
+    def schedule_upload(sender, instance, **kwargs):
+        pending = instance.__dict__.get('_pending_image_uploads', set())
+        if field_name not in pending:
+            return
+        pending.discard(field_name)
+        name = getattr(instance, field_name).name
+        limit = max_dimension(instance) if callable(max_dimension) else max_dimension
+        transaction.on_commit(lambda: schedule(sender, instance.pk, field_name, name, limit, placeholder_field))
+
+    # weak=False: the receivers are closures that would otherwise be collected
+    pre_save.connect(remember_upload, sender=model, weak=False,
+                     dispatch_uid=f'normalize_pre_{model._meta.label}_{field_name}')
+    post_save.connect(schedule_upload, sender=model, weak=False,
+                      dispatch_uid=f'normalize_post_{model._meta.label}_{field_name}')
@@ -0,0 +1,38 @@
+"""
+Responses for media files that need an access check.
+
+Public media is served by nginx directly. Protected files are routed to a
+Django view which, once it has checked access, hands the transfer back to
+nginx with an X-Accel-Redirect to the internal MEDIA_ACCEL_PREFIX location,
+so no worker streams file bytes and nginx answers range requests. Without
+MEDIA_ACCEL_PREFIX (development) the file is streamed with FileResponse.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header
+
+
+def serve_protected(name, storage=default_storage, as_attachment=False):
+    """Response sending the stored file `name` to a client already allowed to see it."""
+    content_type, encoding = mimetypes.guess_type(name)
+    content_type = content_type or 'application/octet-stream'
+
+    prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '')
+    if prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+    else:
+        if not storage.exists(name):
+            raise Http404
+        response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, os.path.basename(name))
+    # nginx keeps these upstream headers on the redirected response
+    response['Cache-Control'] = 'private, no-store'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -96,6 +96,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # BEGIN IMMEDIATE takes the write lock when a transaction starts, so
+            # concurrent writers (e.g. seat reservations) queue up instead of
+            # failing with "database is locked" on lock upgrade.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -151,4 +158,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = MEDIA_DIR
\ No newline at end of file
+MEDIA_ROOT = MEDIA_DIR
+
+# Internal nginx location mapped to MEDIA_ROOT (see nginx/nginx.conf). When
+# set, protected files are answered with X-Accel-Redirect and nginx sends
+# the bytes; when empty (runserver), Django streams them itself.
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '')
+
+# Uploads are stored once per distinct content (see heavenknows/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'heavenknows.storage.DedupFileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Uploaded photos are downscaled and re-encoded off the request thread
+# (see heavenknows/images.py)
+IMAGE_MAX_DIMENSION = 2048
+IMAGE_KEEP_ORIGINALS = False
+IMAGE_WORKERS = 2
+
+# Chunked explore video uploads (see explore/uploads.py)
+VIDEO_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'upload_chunks')
+VIDEO_UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+
+# Explore like/comment counters are written in batches (see explore/counters.py)
+COUNTER_FLUSH_SECONDS = 2
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Content-addressed media storage.
+
+Each distinct file content is stored once, as a blob named by its SHA-256
+digest under BLOB_DIR. Uploads are hashed while they are streamed in chunks to
+a temporary file, then the stored name is created as a hard link to the blob.
+The FileField/ImageField API is unchanged, while duplicate uploads share one
+copy on disk.
+
+Stored names carry the start of the content digest before the extension
+(upload_to path and all: "explore/videos/v_3f2a9c01d4b7.mp4"), so a name never
+points at different bytes, even after the file at it is deleted and the same
+name is uploaded again. That is what lets the web server cache /media/ URLs
+as immutable.
+
+The blob's hard link count is its reference count: delete() removes a name,
+and the blob with its last name. On filesystems without hard links the name
+gets a private copy instead. The dedupe_media command converts existing media
+and collects unreferenced blobs.
+"""
+import hashlib
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+
+BLOB_DIR = '.blobs'
+CHUNK_SIZE = 64 * 1024
+# Hex digits of the digest in stored names
+NAME_DIGEST_LENGTH = 12
+
+_DIGEST_SUFFIX_RE = re.compile(r'_[0-9a-f]{%d}$' % NAME_DIGEST_LENGTH)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DedupFileSystemStorage(FileSystemStorage):
+
+    @property
+    def blob_root(self):
+        return os.path.join(self.location, BLOB_DIR)
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_root, digest[:2], digest)
+
+    def _write_temp(self, content):
+        """Stream content to a temp file in the blob root, hashing it on the way."""
+        os.makedirs(self.blob_root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_root, prefix='.upload-')
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(CHUNK_SIZE):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return digest.hexdigest(), tmp_path
+
+    def store_blob(self, tmp_path, digest):
+        """Move a hashed temp file into place as the blob, unless the blob exists already."""
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            # link, not rename: an existing blob must keep its inode, which its names share
+            os.link(tmp_path, blob)
+        except FileExistsError:
+            pass
+        except OSError:
+            # No hard links on this filesystem; names will get copies of the blob
+            os.replace(tmp_path, blob)
+            return blob
+        else:
+            if self.file_permissions_mode is not None:
+                os.chmod(blob, self.file_permissions_mode)
+        os.remove(tmp_path)
+        return blob
+
+    @staticmethod
+    def _link_or_copy(blob, full_path):
+        """Create full_path as a name of blob. Raises FileExistsError if it exists."""
+        try:
+            os.link(blob, full_path)
+        except FileExistsError:
+            raise
+        except OSError:
+            # No hard links here (e.g. another filesystem): keep a private copy
+            with open(full_path, 'xb') as f, open(blob, 'rb') as source:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+
+    @staticmethod
+    def content_name(name, digest, max_length=None):
+        """name with the content digest before its extension, replacing an earlier one."""
+        dir_name, file_name = os.path.split(str(name).replace('\\', '/'))
+        file_ext = ''.join(pathlib.PurePath(file_name).suffixes)
+        file_root = _DIGEST_SUFFIX_RE.sub('', file_name.removesuffix(file_ext))
+        suffix = f'_{digest[:NAME_DIGEST_LENGTH]}{file_ext}'
+        if max_length is not None:
+            # Shorten the uploaded name, never the digest
+            excess = len(os.path.join(dir_name, file_root + suffix)) - max_length
+            if excess > 0:
+                file_root = file_root[:-excess]
+                if not file_root:
+                    raise SuspiciousFileOperation(
+                        f'Storage can not fit "{name}" with its digest in {max_length} characters.'
+                    )
+        return os.path.join(dir_name, file_root + suffix)
+
+    def save(self, name, content, max_length=None):
+        # Storage.save(), except that the content is hashed before the name is chosen
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        digest, tmp_path = self._write_temp(content)
+        try:
+            name = self.get_available_name(self.content_name(name, digest, max_length), max_length=max_length)
+            validate_file_name(name, allow_relative_path=True)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return self._store(name, digest, tmp_path)
+
+    def _save(self, name, content):
+        digest, tmp_path = self._write_temp(content)
+        return self._store(name, digest, tmp_path)
+
+    def _store(self, name, digest, tmp_path):
+        """Create `name` (or a free variant of it) as a name of the hashed temp file's blob."""
+        blob = self.store_blob(tmp_path, digest)
+
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        while True:
+            try:
+                self._link_or_copy(blob, full_path)
+                break
+            except FileExistsError:
+                # A file with this name appeared meanwhile
+                name = self.get_available_name(name)
+                full_path = self.path(name)
+
+        name = os.path.relpath(full_path, self.location)
+        name = name.replace('\\', '/')
+        validate_file_name(name, allow_relative_path=True)
+        return name
+
+    def delete(self, name):
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if stat.st_nlink != 2:
+            # Other names still share the blob, or the file was never deduplicated
+            return super().delete(name)
+
+        # Last name of its blob: remove both
+        blob = self.blob_path(file_digest(path))
+        super().delete(name)
+        try:
+            if os.stat(blob).st_ino == stat.st_ino:
+                os.remove(blob)
+        except FileNotFoundError:
+            pass
+
+    def listdir(self, path):
+        directories, files = super().listdir(path)
+        if os.path.normpath(self.path(path)) == os.path.normpath(self.location):
+            directories = [d for d in directories if d != BLOB_DIR]
+        return directories, files
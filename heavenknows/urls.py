@@ -19,5 +19,13 @@ admin.site.site_title = 'HeavenKnows Adminstration'                  # default:
 
 from django.conf import settings
 from django.conf.urls.static import static
+from django.urls import re_path
+from businesses.views import business_document
+
+# Ahead of the public media route; nginx sends these two directories here too
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>(?:business_docs|request_letters)/.+)$',
+            business_document, name='business_document'),
+]
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
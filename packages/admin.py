@@ -1,3 +1,24 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import PackageDeparture, SeatHold
+
+
+# ---------- DEPARTURE ADMIN ----------
+class SeatHoldInline(admin.TabularInline):
+    model = SeatHold
+    extra = 0
+    fields = ('user', 'seats', 'status', 'booking', 'expires_at', 'created_at')
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(PackageDeparture)
+class PackageDepartureAdmin(admin.ModelAdmin):
+    list_display = ('package', 'start_date', 'capacity', 'seats_confirmed', 'seats_held', 'is_closed')
+    list_filter = ('is_closed', 'start_date')
+    search_fields = ('package__title',)
+    date_hierarchy = 'start_date'
+    # Counters are maintained by packages.inventory only
+    readonly_fields = ('seats_held', 'seats_confirmed', 'created_at', 'updated_at')
+    inlines = [SeatHoldInline]
+    ordering = ('start_date',)
@@ -3,17 +3,31 @@ from .models import TourPackage, PackageItinerary
 from destinations.models import Destination
 
 
+class DestinationPickerField(forms.ModelMultipleChoiceField):
+    """
+    Multiple destination choice that never enumerates the catalog.
+    Options are fetched page by page from the picker API; the form only renders
+    the selected ids as hidden inputs and validates the submitted ids with a
+    single pk__in query.
+    """
+    widget = forms.MultipleHiddenInput
+
+    def __init__(self, queryset=None, max_choices=30, **kwargs):
+        if queryset is None:
+            queryset = Destination.objects.filter(is_active=True)
+        self.max_choices = max_choices
+        super().__init__(queryset, **kwargs)
+
+    def clean(self, value):
+        if value and len(value) > self.max_choices:
+            raise forms.ValidationError(f'Select at most {self.max_choices} destinations.')
+        return super().clean(value)
+
+
 class TourPackageForm(forms.ModelForm):
     """Form for creating/editing tour packages"""
     
-    destinations = forms.ModelMultipleChoiceField(
-        queryset=Destination.objects.filter(is_active=True),
-        widget=forms.SelectMultiple(attrs={
-            'class': 'hidden',
-            'id': 'destination-select'
-        }),
-        required=True
-    )
+    destinations = DestinationPickerField(required=True)
     
     class Meta:
         model = TourPackage
@@ -0,0 +1,99 @@
+"""
+Idempotent form POSTs.
+
+Forms carry an `idempotency_key` hidden field (or clients send an
+Idempotency-Key header). The first request with a key records it as in
+progress, runs the view and stores the response status and redirect target.
+A retry with the same key gets that response back without touching the
+booking or review tables; a concurrent duplicate gets 409 while the first one
+is still running. Keys expire after KEY_TTL and are purged by the
+purge_idempotency_keys command.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.contrib import messages
+from django.db import IntegrityError
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+KEY_TTL = timedelta(hours=24)
+# An in-progress key older than this belongs to a request that died midway
+STALE_AFTER = timedelta(minutes=2)
+IGNORED_FIELDS = {'csrfmiddlewaretoken', 'idempotency_key'}
+
+
+def _request_key(request):
+    key = request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key', '')
+    return key.strip()[:64]
+
+
+def _request_hash(request):
+    digest = hashlib.sha256(request.path.encode())
+    for name in sorted(set(request.POST) - IGNORED_FIELDS):
+        for value in request.POST.getlist(name):
+            digest.update(f'\0{name}={value}'.encode())
+    return digest.hexdigest()
+
+
+def _replay(request, record):
+    messages.info(request, 'This request was already submitted.')
+    if record.response_location:
+        return HttpResponseRedirect(record.response_location)
+    return HttpResponse(status=record.response_status)
+
+
+def idempotent(endpoint):
+    """Decorator for POST handlers of login-protected views."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            key = _request_key(request)
+            if not key or not request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+
+            now = timezone.now()
+            request_hash = _request_hash(request)
+            lookup = {'user': request.user, 'endpoint': endpoint, 'key': key}
+            try:
+                record = IdempotencyKey.objects.create(
+                    request_hash=request_hash, expires_at=now + KEY_TTL, **lookup
+                )
+            except IntegrityError:
+                record = IdempotencyKey.objects.filter(**lookup).first()
+                if record is None or record.expires_at <= now or (
+                    record.response_status is None and record.created_at <= now - STALE_AFTER
+                ):
+                    # Expired or abandoned: let this request take the key over
+                    IdempotencyKey.objects.filter(**lookup).delete()
+                    return _wrapped_view(request, *args, **kwargs)
+                if record.request_hash != request_hash:
+                    return HttpResponse('Idempotency key reused with different data.', status=422)
+                if record.response_status is None:
+                    return HttpResponse('This request is already being processed.', status=409)
+                return _replay(request, record)
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            # Only remember responses that completed the action; failures may be retried
+            if response.status_code < 400 and getattr(request, '_idempotent_success', True):
+                record.response_status = response.status_code
+                record.response_location = response.get('Location', '')[:255]
+                record.save(update_fields=['response_status', 'response_location'])
+            else:
+                record.delete()
+            return response
+        return _wrapped_view
+    return decorator
+
+
+def mark_failed(request):
+    """Flag a handled failure (e.g. an error redirect) so its key is not remembered."""
+    request._idempotent_success = False
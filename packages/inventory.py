@@ -0,0 +1,192 @@
+"""
+Seat inventory for package departures.
+
+Every change to a departure's counters happens inside a transaction that first
+locks the departure row: SELECT ... FOR UPDATE on PostgreSQL, and on SQLite
+the connection opens its transactions with BEGIN IMMEDIATE (see the
+"transaction_mode" option in settings.DATABASES), which takes the database
+write lock up front. Concurrent bookers for the same date are therefore
+serialized and a departure can never be oversold.
+
+Seats are first held for a short time (HOLD_TTL) and then confirmed against a
+booking; a user has at most one hold per departure. Expired holds are swept lazily whenever the departure is locked and
+by the release_expired_holds management command.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import PackageDeparture, SeatHold
+
+HOLD_TTL = timedelta(minutes=10)
+
+
+class SoldOut(Exception):
+    def __init__(self, seats_available):
+        self.seats_available = seats_available
+        super().__init__(f'Only {seats_available} seats left for this departure.')
+
+
+class HoldExpired(Exception):
+    pass
+
+
+def _lock_departure(package, start_date, create=True):
+    """Fetch and lock the departure row; must run inside transaction.atomic()."""
+    queryset = PackageDeparture.objects.select_for_update()
+    try:
+        return queryset.get(package=package, start_date=start_date)
+    except PackageDeparture.DoesNotExist:
+        if not create:
+            raise
+    try:
+        with transaction.atomic():
+            return PackageDeparture.objects.create(
+                package=package, start_date=start_date, capacity=package.group_size_max
+            )
+    except IntegrityError:
+        # Another booker created it first
+        return queryset.get(package=package, start_date=start_date)
+
+
+def _release_expired(departure, now):
+    expired = SeatHold.objects.filter(departure=departure, status='HELD', expires_at__lte=now)
+    seats = expired.aggregate(total=Sum('seats'))['total'] or 0
+    if seats:
+        expired.update(status='EXPIRED')
+        PackageDeparture.objects.filter(pk=departure.pk).update(seats_held=F('seats_held') - seats)
+        departure.seats_held -= seats
+    return seats
+
+
+def _release_user_holds(departure, user):
+    """Release the user's active holds on the departure; the departure must be locked."""
+    active = SeatHold.objects.filter(departure=departure, user=user, status='HELD')
+    seats = active.aggregate(total=Sum('seats'))['total'] or 0
+    if seats:
+        active.update(status='RELEASED')
+        PackageDeparture.objects.filter(pk=departure.pk).update(seats_held=F('seats_held') - seats)
+        departure.seats_held -= seats
+    return seats
+
+
+def hold_seats(package, start_date, seats, user, ttl=HOLD_TTL):
+    """
+    Hold seats on a departure, replacing the user's earlier hold on it, so one
+    account cannot pile up holds. Raises SoldOut when not enough seats are left.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        departure = _lock_departure(package, start_date)
+        if departure.is_closed:
+            raise SoldOut(0)
+        _release_expired(departure, now)
+        _release_user_holds(departure, user)
+        if departure.seats_available < seats:
+            raise SoldOut(departure.seats_available)
+
+        PackageDeparture.objects.filter(pk=departure.pk).update(seats_held=F('seats_held') + seats)
+        return SeatHold.objects.create(
+            departure=departure, user=user, seats=seats, expires_at=now + ttl
+        )
+
+
+def confirm_hold(hold, booking=None):
+    """Turn an unexpired hold into confirmed seats. Raises HoldExpired otherwise."""
+    with transaction.atomic():
+        departure = PackageDeparture.objects.select_for_update().get(pk=hold.departure_id)
+        hold = SeatHold.objects.get(pk=hold.pk)
+        if hold.status != 'HELD' or hold.expires_at <= timezone.now():
+            raise HoldExpired('Your seat reservation has expired. Please try again.')
+
+        hold.status = 'CONFIRMED'
+        hold.booking = booking
+        hold.save(update_fields=['status', 'booking'])
+        PackageDeparture.objects.filter(pk=departure.pk).update(
+            seats_held=F('seats_held') - hold.seats,
+            seats_confirmed=F('seats_confirmed') + hold.seats,
+        )
+        return hold
+
+
+def release_hold(hold):
+    """Give back the seats of a held or confirmed hold. No-op for finished holds."""
+    with transaction.atomic():
+        departure = PackageDeparture.objects.select_for_update().get(pk=hold.departure_id)
+        hold = SeatHold.objects.get(pk=hold.pk)
+        if hold.status == 'HELD':
+            counter = 'seats_held'
+        elif hold.status == 'CONFIRMED':
+            counter = 'seats_confirmed'
+        else:
+            return hold
+
+        hold.status = 'RELEASED'
+        hold.save(update_fields=['status'])
+        PackageDeparture.objects.filter(pk=departure.pk).update(**{counter: F(counter) - hold.seats})
+        return hold
+
+
+def book_seats(booking):
+    """
+    Hold and confirm seats for a new booking in one transaction, saving the booking.
+    Raises SoldOut when the departure cannot take the booking's travelers.
+    """
+    with transaction.atomic():
+        hold = hold_seats(booking.package, booking.preferred_start_date, booking.number_of_travelers, booking.user)
+        booking.save()
+        return confirm_hold(hold, booking)
+
+
+def release_booking(booking):
+    """Return the seats of a cancelled booking to its departure."""
+    hold = SeatHold.objects.filter(booking=booking, status='CONFIRMED').first()
+    if hold is not None:
+        release_hold(hold)
+
+
+def release_bookings(booking_ids):
+    """Return the seats of many cancelled bookings, one UPDATE per departure."""
+    with transaction.atomic():
+        holds = SeatHold.objects.filter(booking_id__in=booking_ids, status='CONFIRMED')
+        departure_ids = set(holds.values_list('departure_id', flat=True))
+        if not departure_ids:
+            return
+        # Lock in id order so concurrent bulk releases cannot deadlock, then
+        # count again: a hold may have been released meanwhile
+        list(PackageDeparture.objects.select_for_update().filter(pk__in=departure_ids).order_by('pk'))
+        seats_by_departure = list(
+            holds.values('departure_id').annotate(total=Sum('seats')).values_list('departure_id', 'total').order_by()
+        )
+        holds.update(status='RELEASED')
+        for departure_id, seats in seats_by_departure:
+            PackageDeparture.objects.filter(pk=departure_id).update(seats_confirmed=F('seats_confirmed') - seats)
+
+
+def seats_available(package, start_date):
+    """Seats left on a departure, counting expired holds as free (read-only)."""
+    departure = PackageDeparture.objects.filter(package=package, start_date=start_date).first()
+    if departure is None:
+        return package.group_size_max
+    if departure.is_closed:
+        return 0
+    expired = departure.holds.filter(status='HELD', expires_at__lte=timezone.now()).aggregate(
+        total=Sum('seats')
+    )['total'] or 0
+    return max(departure.capacity - departure.seats_confirmed - departure.seats_held + expired, 0)
+
+
+def release_expired_holds():
+    """Sweep expired holds on every departure. Returns the number of seats freed."""
+    now = timezone.now()
+    departure_ids = SeatHold.objects.filter(status='HELD', expires_at__lte=now).values_list(
+        'departure_id', flat=True
+    ).distinct()
+    freed = 0
+    for departure_id in list(departure_ids):
+        with transaction.atomic():
+            departure = PackageDeparture.objects.select_for_update().get(pk=departure_id)
+            freed += _release_expired(departure, now)
+    return freed
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from packages.models import BookingSequence
+from packages.numbering import BookingNumberAllocator
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress test the booking number allocator: several allocators (one per "
+        "simulated worker process) hand out numbers from many threads at once; "
+        "checks that every number is unique. Uses a throwaway sequence day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--date', default='2099-12-31', help="Sequence day to use, must be unused")
+
+    def handle(self, *args, **options):
+        day = date.fromisoformat(options['date'])
+        if BookingSequence.objects.filter(day=day).exists():
+            raise CommandError(f"A booking sequence for {day} already exists; pick another --date")
+
+        allocators = [BookingNumberAllocator() for _ in range(options['workers'])]
+        count, threads = options['count'], options['threads']
+
+        def run(thread_index):
+            allocator = allocators[thread_index % len(allocators)]
+            share = count // threads + (1 if thread_index < count % threads else 0)
+            try:
+                return [allocator.allocate(day) for _ in range(share)]
+            finally:
+                connection.close()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                numbers = [n for chunk in pool.map(run, range(threads)) for n in chunk]
+            elapsed = time.perf_counter() - started
+        finally:
+            BookingSequence.objects.filter(day=day).delete()
+
+        unique = len(set(numbers))
+        self.stdout.write(
+            f"{len(numbers)} numbers from {options['workers']} allocators on {threads} threads "
+            f"in {elapsed:.2f}s ({len(numbers) / elapsed:.0f}/s), longest {max(map(len, numbers))} chars"
+        )
+        if unique != len(numbers) or len(numbers) != count:
+            raise CommandError(f"{len(numbers) - unique} duplicate booking numbers")
+        self.stdout.write(self.style.SUCCESS("No collisions"))
@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from packages import inventory
+from packages.models import PackageDeparture, SeatHold, TourPackage
+
+
+class Command(BaseCommand):
+    help = (
+        "Contention benchmark: many parallel bookers hold and confirm seats on one "
+        "departure. Verifies the departure is never oversold and reports throughput. "
+        "Uses a throwaway departure date that is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--package', help="Package slug (defaults to the first package)")
+        parser.add_argument('--date', default='2099-01-01', help="Departure date to use, must be unused")
+        parser.add_argument('--capacity', type=int, default=100)
+        parser.add_argument('--bookers', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--max-seats', type=int, default=3)
+
+    def handle(self, *args, **options):
+        packages = TourPackage.objects.select_related('travel_business__user')
+        package = packages.filter(slug=options['package']).first() if options['package'] else packages.first()
+        if package is None:
+            raise CommandError("No package found")
+        start_date = date.fromisoformat(options['date'])
+        if PackageDeparture.objects.filter(package=package, start_date=start_date).exists():
+            raise CommandError(f"{package.slug} already has a departure on {start_date}; pick another --date")
+
+        departure = PackageDeparture.objects.create(
+            package=package, start_date=start_date, capacity=options['capacity']
+        )
+        user = package.travel_business.user
+        rng = random.Random(42)
+        requests = [rng.randint(1, options['max_seats']) for _ in range(options['bookers'])]
+        results = {'booked': 0, 'seats': 0, 'sold_out': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def book(seats):
+            try:
+                hold = inventory.hold_seats(package, start_date, seats, user)
+                inventory.confirm_hold(hold)
+                outcome = 'booked'
+            except inventory.SoldOut:
+                outcome = 'sold_out'
+            except Exception:
+                outcome = 'errors'
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+                if outcome == 'booked':
+                    results['seats'] += seats
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(book, requests))
+            elapsed = time.perf_counter() - started
+
+            departure.refresh_from_db()
+            confirmed_in_holds = departure.holds.filter(status='CONFIRMED').aggregate(total=Sum('seats'))['total'] or 0
+        finally:
+            SeatHold.objects.filter(departure=departure).delete()
+            departure.delete()
+
+        self.stdout.write(
+            f"{options['bookers']} bookers on {options['threads']} threads in {elapsed:.2f}s "
+            f"({options['bookers'] / elapsed:.0f} reservations/s)"
+        )
+        self.stdout.write(
+            f"booked={results['booked']} seats={results['seats']} sold_out={results['sold_out']} "
+            f"errors={results['errors']} capacity={departure.capacity}"
+        )
+        consistent = (
+            departure.seats_confirmed == results['seats'] == confirmed_in_holds
+            and departure.seats_confirmed <= departure.capacity
+            and departure.seats_held == 0
+            and results['errors'] == 0
+        )
+        if not consistent:
+            raise CommandError(
+                f"Inconsistent totals: departure confirmed={departure.seats_confirmed}, "
+                f"held={departure.seats_held}, holds confirmed={confirmed_in_holds}"
+            )
+        self.stdout.write(self.style.SUCCESS("Totals consistent, no overselling"))
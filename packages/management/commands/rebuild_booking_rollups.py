@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from businesses.stats import REVENUE_STATUSES
+from packages.models import BookingRollup, PackageBooking
+from packages.rollups import STATUS_FIELDS, month_start
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily and monthly booking rollups from all bookings"
+
+    def handle(self, *args, **options):
+        # Aggregate and replace in one transaction so bookings written meanwhile
+        # are not lost between the read and the swap
+        with transaction.atomic():
+            rows = (
+                PackageBooking.objects
+                .annotate(day=TruncDate('created_at'))
+                .values('travel_business_id', 'package_id', 'day', 'status')
+                .annotate(n=Count('id'), travelers=Sum('number_of_travelers'), revenue=Sum('total_amount'))
+                .order_by()
+            )
+
+            rollups = defaultdict(lambda: defaultdict(int))
+            for row in rows.iterator(chunk_size=2000):
+                for period, day in (('DAY', row['day']), ('MONTH', month_start(row['day']))):
+                    counts = rollups[(row['travel_business_id'], row['package_id'], period, day)]
+                    counts[STATUS_FIELDS[row['status']]] += row['n']
+                    if row['status'] in REVENUE_STATUSES:
+                        counts['travelers'] += row['travelers']
+                        counts['revenue'] += row['revenue']
+
+            BookingRollup.objects.all().delete()
+            BookingRollup.objects.bulk_create(
+                [
+                    BookingRollup(business_id=business_id, package_id=package_id, period=period, day=day, **counts)
+                    for (business_id, package_id, period, day), counts in rollups.items()
+                ],
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rollups)} booking rollup rows"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from packages import popularity
+
+
+class Command(BaseCommand):
+    help = "Recompute the decayed popularity of packages and destinations (run e.g. hourly)"
+
+    def handle(self, *args, **options):
+        changed = popularity.refresh()
+        self.stdout.write(self.style.SUCCESS(f"Updated popularity of {changed} packages and destinations"))
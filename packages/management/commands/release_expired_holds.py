@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from packages import inventory
+
+
+class Command(BaseCommand):
+    help = "Return seats of expired seat holds to their departures"
+
+    def handle(self, *args, **options):
+        freed = inventory.release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f"Released {freed} seats from expired holds"))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:15
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0002_packagebooking_packagereview'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageDeparture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('capacity', models.PositiveIntegerField(help_text='Total seats for this departure')),
+                ('seats_held', models.PositiveIntegerField(default=0)),
+                ('seats_confirmed', models.PositiveIntegerField(default=0)),
+                ('is_closed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departures', to='packages.tourpackage')),
+            ],
+            options={
+                'ordering': ['package', 'start_date'],
+                'unique_together': {('package', 'start_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('seats', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('status', models.CharField(choices=[('HELD', 'Held'), ('CONFIRMED', 'Confirmed'), ('RELEASED', 'Released'), ('EXPIRED', 'Expired')], default='HELD', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seat_hold', to='packages.packagebooking')),
+                ('departure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='packages.packagedeparture')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['departure', 'status', 'expires_at'], name='packages_se_departu_3c2283_idx'), models.Index(fields=['status', 'expires_at'], name='packages_se_status_a35f44_idx')],
+            },
+        ),
+    ]
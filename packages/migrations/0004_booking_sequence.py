@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0003_package_departures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('next_value', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0002_business_stats'),
+        ('packages', '0005_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('DAY', 'Day'), ('MONTH', 'Month')], max_length=5)),
+                ('day', models.DateField(help_text='The day, or the first day of the month')),
+                ('pending_bookings', models.IntegerField(default=0)),
+                ('confirmed_bookings', models.IntegerField(default=0)),
+                ('cancelled_bookings', models.IntegerField(default=0)),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('travelers', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_rollups', to='businesses.businessprofile')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_rollups', to='packages.tourpackage')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['business', 'period', 'day'], name='packages_bo_busines_c28b92_idx')],
+                'unique_together': {('package', 'period', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_travel_business(apps, schema_editor):
+    PackageBooking = apps.get_model('packages', 'PackageBooking')
+    TourPackage = apps.get_model('packages', 'TourPackage')
+    PackageBooking.objects.filter(travel_business__isnull=True).update(
+        travel_business=Subquery(TourPackage.objects.filter(pk=OuterRef('package_id')).values('travel_business')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0002_business_stats'),
+        ('packages', '0006_booking_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packagebooking',
+            name='travel_business',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='businesses.businessprofile'),
+        ),
+        migrations.RunPython(backfill_travel_business, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='packagebooking',
+            name='travel_business',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='businesses.businessprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='packagebooking',
+            index=models.Index(fields=['travel_business', '-created_at', '-id'], name='packages_pa_travel__79a812_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagebooking',
+            index=models.Index(fields=['travel_business', 'status', '-created_at', '-id'], name='packages_pa_travel__232347_idx'),
+        ),
+    ]
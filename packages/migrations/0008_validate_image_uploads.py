@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:31
+
+import heavenknows.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0007_booking_travel_business'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tourpackage',
+            name='cover_image',
+            field=models.ImageField(upload_to='packages/', validators=[heavenknows.images.validate_image_upload]),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:48
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Copied from packages.popularity as of this migration, so later changes
+# there do not change (or break) this backfill
+BOOKING_WEIGHT = 20.0
+REVIEW_WEIGHT = 5.0
+HALF_LIFE_DAYS = 7
+WINDOW_DAYS = 60
+
+
+def decayed_score(bookings, reviews, age_days):
+    return (BOOKING_WEIGHT * bookings + REVIEW_WEIGHT * reviews) * 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def backfill_popularity(apps, schema_editor):
+    """Seed buckets from recent bookings and reviews; views before this have no dates."""
+    TourPackage = apps.get_model('packages', 'TourPackage')
+    Destination = apps.get_model('destinations', 'Destination')
+    PackageBooking = apps.get_model('packages', 'PackageBooking')
+    PackageReview = apps.get_model('packages', 'PackageReview')
+    PopularityBucket = apps.get_model('packages', 'PopularityBucket')
+
+    today = timezone.localdate()
+    since = timezone.now() - timedelta(days=WINDOW_DAYS)
+    destinations = defaultdict(list)
+    for package_id, destination_id in TourPackage.destinations.through.objects.values_list('tourpackage_id', 'destination_id'):
+        destinations[package_id].append(destination_id)
+
+    counts = defaultdict(lambda: {'bookings': 0, 'reviews': 0})
+    for model, field in ((PackageBooking, 'bookings'), (PackageReview, 'reviews')):
+        rows = model.objects.filter(created_at__gte=since).annotate(day=TruncDate('created_at')).values(
+            'package_id', 'day'
+        ).annotate(n=Count('id')).values_list('package_id', 'day', 'n')
+        for package_id, day, n in rows:
+            counts['PACKAGE', package_id, day][field] += n
+            for destination_id in destinations[package_id]:
+                counts['DESTINATION', destination_id, day][field] += n
+    PopularityBucket.objects.bulk_create([
+        PopularityBucket(kind=kind, object_id=object_id, day=day, **fields)
+        for (kind, object_id, day), fields in counts.items()
+    ], batch_size=500)
+
+    scores = defaultdict(float)
+    for (kind, object_id, day), fields in counts.items():
+        scores[kind, object_id] += decayed_score(fields['bookings'], fields['reviews'], max((today - day).days, 0))
+    for (kind, object_id), score in scores.items():
+        model = TourPackage if kind == 'PACKAGE' else Destination
+        model.objects.filter(pk=object_id).update(popularity=round(score, 4))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0006_image_placeholders'),
+        ('destinations', '0008_popularity'),
+        ('packages', '0009_image_placeholders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PACKAGE', 'Package'), ('DESTINATION', 'Destination')], max_length=12)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tourpackage',
+            index=models.Index(fields=['status', '-popularity', '-id'], name='packages_to_status_74d122_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='popularitybucket',
+            index=models.Index(fields=['day'], name='packages_po_day_ad460d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='popularitybucket',
+            unique_together={('kind', 'object_id', 'day')},
+        ),
+        migrations.RunPython(backfill_popularity, migrations.RunPython.noop),
+    ]
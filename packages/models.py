@@ -1,9 +1,16 @@
 from django.db import models
 from destinations.models import Destination
 from businesses.models import BusinessProfile
+from heavenknows.images import validate_image_upload
 
 # import slugify
 from django.utils.text import slugify
+from django.db import transaction
+
+# Fields feeding businesses.BusinessStats and BookingRollup; saves limited to
+# other fields skip the bookkeeping
+STATS_PACKAGE_FIELDS = {'travel_business', 'travel_business_id', 'status'}
+STATS_BOOKING_FIELDS = {'package', 'package_id', 'status', 'total_amount', 'number_of_travelers'}
 
 
 class TourPackage(models.Model):
@@ -45,23 +52,47 @@ class TourPackage(models.Model):
     available_to = models.DateField(null=True, blank=True)
     
     # Media
-    cover_image = models.ImageField(upload_to='packages/')
+    cover_image = models.ImageField(
+        upload_to='packages/', validators=[validate_image_upload],
+    )
+    cover_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Tiny preview shown while the image loads (data URI)
+    cover_image_placeholder = models.TextField(blank=True, editable=False)
     
     # Status
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='DRAFT')
     is_featured = models.BooleanField(default=False)
     view_count = models.PositiveIntegerField(default=0)
+    # Decayed views, bookings and reviews, see popularity.py
+    popularity = models.FloatField(default=0, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-is_featured', '-created_at']
+        indexes = [
+            # "Most popular" sort of the package list
+            models.Index(fields=['status', '-popularity', '-id']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not STATS_PACKAGE_FIELDS & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        # Move this package between the dashboard counters of its business
+        from businesses import stats
+        with transaction.atomic():
+            previous = TourPackage.objects.filter(pk=self.pk).values_list('travel_business_id', 'status').first()
+            super().save(*args, **kwargs)
+            stats.apply_change(
+                previous and stats.package_counts(*previous),
+                stats.package_counts(self.travel_business_id, self.status),
+            )
 
     def __str__(self):
         return f"{self.title} by {self.travel_business.business_name}"
@@ -87,6 +118,8 @@ class PackageItinerary(models.Model):
     
 
 
+import uuid
+
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 
@@ -141,6 +174,10 @@ class PackageBooking(models.Model):
     # Relations
     package = models.ForeignKey('TourPackage', on_delete=models.CASCADE, related_name='bookings')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='package_bookings')
+    # Copy of package.travel_business so a business's bookings are one index range
+    travel_business = models.ForeignKey(
+        BusinessProfile, on_delete=models.CASCADE, related_name='bookings', editable=False
+    )
     
     # Traveler details
     lead_traveler_name = models.CharField(max_length=255)
@@ -167,21 +204,194 @@ class PackageBooking(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Booking console: newest first, optionally by status
+            models.Index(fields=['travel_business', '-created_at', '-id']),
+            models.Index(fields=['travel_business', 'status', '-created_at', '-id']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.booking_number:
-            # Generate booking number: PKG-YYYYMMDD-XXXX
-            from django.utils import timezone
-            import random
-            date_str = timezone.now().strftime('%Y%m%d')
-            random_str = ''.join([str(random.randint(0, 9)) for _ in range(4)])
-            self.booking_number = f"PKG-{date_str}-{random_str}"
-        super().save(*args, **kwargs)
+            # Booking number: PKG-YYYYMMDD-NNNN from a per-day sequence
+            from .numbering import allocate_booking_number
+            self.booking_number = allocate_booking_number()
+        if self.travel_business_id is None:
+            self.travel_business_id = self.package.travel_business_id
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not STATS_BOOKING_FIELDS & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        # Move this booking between the business stats and rollup counters
+        from . import rollups
+        with transaction.atomic():
+            previous = rollups.stored_facts(self.pk)
+            super().save(*args, **kwargs)
+            rollups.apply_booking_change(previous, rollups.booking_facts(self))
     
     def __str__(self):
         return f"{self.booking_number} - {self.package.title}"
 
 
+class BookingRollup(models.Model):
+    """
+    Booking aggregates of one package for one day or one month, by booking date.
+    Maintained incrementally with every booking write (see packages.rollups) so
+    trend charts read a handful of rows instead of scanning bookings.
+    """
+
+    PERIOD_CHOICES = [
+        ('DAY', 'Day'),
+        ('MONTH', 'Month'),
+    ]
+
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name='booking_rollups')
+    package = models.ForeignKey('TourPackage', on_delete=models.CASCADE, related_name='booking_rollups')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    day = models.DateField(help_text="The day, or the first day of the month")
+
+    # Bookings by status
+    pending_bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    cancelled_bookings = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+
+    # Travelers and revenue of confirmed and completed bookings
+    travelers = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['package', 'period', 'day']
+        indexes = [
+            models.Index(fields=['business', 'period', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.package_id} {self.get_period_display()} {self.day}"
+
+
+class PopularityBucket(models.Model):
+    """
+    Views, bookings and reviews of a package or destination on one day,
+    written in batches by packages.popularity and decayed into their
+    popularity column.
+    """
+
+    KIND_CHOICES = [
+        ('PACKAGE', 'Package'),
+        ('DESTINATION', 'Destination'),
+    ]
+
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    bookings = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['kind', 'object_id', 'day']
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} {self.day}"
+
+
+class BookingSequence(models.Model):
+    """
+    Per-day counter behind booking numbers. Workers reserve blocks of numbers
+    from it (see packages.numbering), so it is written once per block, not per booking.
+    """
+    day = models.DateField(unique=True)
+    next_value = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.day}: next {self.next_value}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Client-supplied idempotency key of a POST and the response it produced,
+    so a retried submission is answered from here instead of redoing the writes.
+    See packages.idempotency.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=64)
+    endpoint = models.CharField(max_length=50)
+    request_hash = models.CharField(max_length=64)  # sha256 of the submitted fields
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)  # Null while in progress
+    response_location = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ['user', 'endpoint', 'key']
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.response_status or 'in progress'})"
+
+
+class PackageDeparture(models.Model):
+    """
+    Seat inventory for one start date of a package.
+    Counters are only changed through packages.inventory, which serializes
+    writers per departure so a date can never be oversold.
+    """
+    package = models.ForeignKey('TourPackage', on_delete=models.CASCADE, related_name='departures')
+    start_date = models.DateField()
+    capacity = models.PositiveIntegerField(help_text="Total seats for this departure")
+    seats_held = models.PositiveIntegerField(default=0)  # Reserved by unexpired holds
+    seats_confirmed = models.PositiveIntegerField(default=0)
+    is_closed = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['package', 'start_date']
+        unique_together = ['package', 'start_date']
+
+    @property
+    def seats_available(self):
+        return max(self.capacity - self.seats_held - self.seats_confirmed, 0)
+
+    def __str__(self):
+        return f"{self.package.title} - {self.start_date} ({self.seats_available}/{self.capacity} available)"
+
+
+class SeatHold(models.Model):
+    """Short-lived reservation of seats on a departure, confirmed by a booking."""
+
+    STATUS_CHOICES = [
+        ('HELD', 'Held'),
+        ('CONFIRMED', 'Confirmed'),
+        ('RELEASED', 'Released'),
+        ('EXPIRED', 'Expired'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    departure = models.ForeignKey(PackageDeparture, on_delete=models.CASCADE, related_name='holds')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seat_holds')
+    booking = models.OneToOneField('PackageBooking', on_delete=models.SET_NULL, null=True, blank=True, related_name='seat_hold')
+    seats = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='HELD')
+    expires_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Expired-hold sweeps per departure and globally
+            models.Index(fields=['departure', 'status', 'expires_at']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.seats} seats on {self.departure} ({self.get_status_display()})"
+
+
 # Update TourPackage model to include average rating method
 # Add this method to your existing TourPackage model:
 """
@@ -0,0 +1,86 @@
+"""
+Booking number allocation: PKG-YYYYMMDD-NNNN.
+
+Numbers come from a per-day sequence (BookingSequence) using the hi/lo scheme:
+each process reserves a block of BLOCK_SIZE numbers with one locked update and
+then hands them out from memory. Numbers are unique without retries; unused
+numbers of a block are simply skipped when a worker restarts.
+
+Blocks are only cached when reserved in autocommit mode. Inside a caller's
+transaction a single number is reserved instead: if that transaction rolls
+back, the sequence update and the booking using the number vanish together,
+so a rolled-back block can never be handed out twice. Callers that want the
+fast path allocate before opening their transaction.
+"""
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+BLOCK_SIZE = 50
+PREFIX = 'PKG'
+
+
+def reserve_block(day, size):
+    """Reserve `size` consecutive numbers for a day; returns the first one."""
+    from .models import BookingSequence
+
+    with transaction.atomic():
+        sequence = BookingSequence.objects.select_for_update().filter(day=day).first()
+        if sequence is None:
+            try:
+                with transaction.atomic():
+                    sequence = BookingSequence.objects.create(day=day, next_value=_first_free_number(day))
+            except IntegrityError:
+                sequence = BookingSequence.objects.select_for_update().get(day=day)
+        start = sequence.next_value
+        sequence.next_value = start + size
+        sequence.save(update_fields=['next_value'])
+    return start
+
+
+def _first_free_number(day):
+    """Start a new day after numbers issued before sequences existed (random suffixes)."""
+    from .models import PackageBooking
+
+    numbers = PackageBooking.objects.filter(
+        booking_number__startswith=f"{PREFIX}-{day:%Y%m%d}-"
+    ).values_list('booking_number', flat=True)
+    suffixes = [int(n.rsplit('-', 1)[1]) for n in numbers if n.rsplit('-', 1)[1].isdigit()]
+    return max(suffixes, default=0) + 1
+
+
+class BookingNumberAllocator:
+    """Thread-safe in-process allocator handing out numbers from reserved blocks."""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = 0
+        self._limit = 0
+
+    def next_value(self, day):
+        with self._lock:
+            if day != self._day or self._next >= self._limit:
+                self._next = reserve_block(day, self.block_size)
+                self._limit = self._next + self.block_size
+                self._day = day
+            value = self._next
+            self._next += 1
+            return value
+
+    def allocate(self, day=None):
+        day = day or timezone.now().date()
+        if connection.in_atomic_block:
+            value = reserve_block(day, 1)
+        else:
+            value = self.next_value(day)
+        return f"{PREFIX}-{day:%Y%m%d}-{value:04d}"
+
+
+_allocator = BookingNumberAllocator()
+
+
+def allocate_booking_number():
+    return _allocator.allocate()
@@ -0,0 +1,152 @@
+"""
+Trip budget planner: "what can I do in N days for X NPR".
+
+Cost and duration ranges of all active destinations and published packages are
+kept in NumPy arrays per process, so answering a query is a handful of
+vectorized operations instead of loading every row into Python. The arrays are
+rebuilt lazily when a Destination or TourPackage changes (see signals.py).
+"""
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.urls import reverse
+
+from destinations.models import Destination
+from .models import TourPackage
+
+KIND_DESTINATION = 0
+KIND_PACKAGE = 1
+KIND_LABELS = {KIND_DESTINATION: 'destination', KIND_PACKAGE: 'package'}
+
+VERSION_CACHE_KEY = 'planner:version'
+# Upper bound on staleness when another process changed the data and the
+# shared cache is process-local (LocMemCache)
+MAX_INDEX_AGE = 300
+
+
+class PlannerIndex:
+    """Column arrays describing every plannable item."""
+
+    def __init__(self, kinds, min_days, max_days, cost_min, cost_max, featured, items, version):
+        self.kinds = kinds
+        self.min_days = min_days
+        self.max_days = max_days
+        self.cost_min = cost_min
+        self.cost_max = cost_max
+        self.featured = featured
+        self.items = items  # (name, slug, url) per row, same order as the arrays
+        self.version = version
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, version):
+        rows = []
+        items = []
+
+        destinations = Destination.objects.filter(is_active=True).values_list(
+            'name', 'slug', 'min_days', 'max_days', 'expected_cost_min', 'expected_cost_max', 'is_featured'
+        )
+        for name, slug, min_days, max_days, cost_min, cost_max, is_featured in destinations:
+            rows.append((
+                KIND_DESTINATION, min_days, max_days or min_days,
+                float(cost_min), float(cost_max if cost_max is not None else cost_min), is_featured,
+            ))
+            items.append((name, slug, reverse('destinations:detail', args=[slug])))
+
+        packages = TourPackage.objects.filter(status='PUBLISHED').values_list(
+            'title', 'slug', 'duration_days', 'price_per_person', 'is_featured'
+        )
+        for title, slug, duration_days, price, is_featured in packages:
+            rows.append((KIND_PACKAGE, duration_days, duration_days, float(price), float(price), is_featured))
+            items.append((title, slug, reverse('packages:detail', args=[slug])))
+
+        columns = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        return cls(
+            kinds=columns[:, 0].astype(np.int8),
+            min_days=columns[:, 1],
+            max_days=columns[:, 2],
+            cost_min=columns[:, 3],
+            cost_max=columns[:, 4],
+            featured=columns[:, 5].astype(bool),
+            items=items,
+            version=version,
+        )
+
+    def search(self, days, budget, kind=None, limit=20):
+        """
+        Rank items that fit within `days` and a per-person `budget`.
+
+        An item fits when its minimum duration and minimum cost are within the
+        limits. The score rewards using the available days fully and having the
+        item's cost range covered by the budget.
+        """
+        fits = (self.min_days <= days) & (self.cost_min <= budget)
+        if kind is not None:
+            fits &= self.kinds == kind
+        candidates = np.flatnonzero(fits)
+        if not candidates.size:
+            return []
+
+        min_days = self.min_days[candidates]
+        max_days = self.max_days[candidates]
+        cost_min = self.cost_min[candidates]
+        cost_max = self.cost_max[candidates]
+
+        day_score = np.minimum(max_days, days) / days
+        cost_span = cost_max - cost_min
+        budget_score = np.where(
+            cost_span > 0,
+            np.clip((budget - cost_min) / np.where(cost_span > 0, cost_span, 1), 0, 1),
+            1.0,
+        )
+        scores = 0.5 * day_score + 0.5 * budget_score + 0.05 * self.featured[candidates]
+
+        if candidates.size > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        results = []
+        for i in top:
+            row = candidates[i]
+            name, slug, url = self.items[row]
+            results.append({
+                'type': KIND_LABELS[int(self.kinds[row])],
+                'name': name,
+                'slug': slug,
+                'url': url,
+                'min_days': int(min_days[i]),
+                'max_days': int(max_days[i]),
+                'cost_min': float(cost_min[i]),
+                'cost_max': float(cost_max[i]),
+                'score': round(float(scores[i]), 4),
+            })
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def mark_stale():
+    """Invalidate planner arrays in every process sharing the cache."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def get_index():
+    """Return the current PlannerIndex, rebuilding it if the data changed."""
+    global _index
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    index = _index
+    if index is not None and index.version == version and time.monotonic() - index.built_at < MAX_INDEX_AGE:
+        return index
+    with _index_lock:
+        if _index is None or _index.version != version or time.monotonic() - _index.built_at >= MAX_INDEX_AGE:
+            _index = PlannerIndex.build(version)
+        return _index
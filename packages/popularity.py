@@ -0,0 +1,185 @@
+"""
+Popularity of packages and destinations.
+
+Detail page views, bookings and reviews are counted per object and day in
+PopularityBucket rows. Like the explore post counters, events are added to an
+in-process buffer and a background thread writes the summed deltas every
+COUNTER_FLUSH_SECONDS, so a page view no longer writes its row; the lifetime
+view_count columns are advanced in the same batch. Bookings and reviews of a
+package also count towards the destinations it visits.
+
+The refresh_popularity command (run e.g. hourly) turns the buckets into the
+indexed `popularity` column of TourPackage and Destination:
+
+    sum over days of (views + BOOKING_WEIGHT * bookings + REVIEW_WEIGHT * reviews)
+                     * 0.5 ** (age in days / HALF_LIFE_DAYS)
+
+so activity counts half as much a week later and old favourites fade out.
+Buckets older than WINDOW_DAYS no longer matter and are deleted.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from destinations.models import Destination
+from .models import PopularityBucket, TourPackage
+
+logger = logging.getLogger(__name__)
+
+KIND_PACKAGE = 'PACKAGE'
+KIND_DESTINATION = 'DESTINATION'
+MODELS = {KIND_PACKAGE: TourPackage, KIND_DESTINATION: Destination}
+EVENT_FIELDS = ('views', 'bookings', 'reviews')
+
+VIEW_WEIGHT = 1.0
+BOOKING_WEIGHT = 20.0
+REVIEW_WEIGHT = 5.0
+HALF_LIFE_DAYS = 7
+WINDOW_DAYS = 60
+
+# (kind, object id, day) -> deltas
+_pending = defaultdict(lambda: dict.fromkeys(EVENT_FIELDS, 0))
+_lock = threading.Lock()
+_flusher = None
+
+
+def _interval():
+    return getattr(settings, 'COUNTER_FLUSH_SECONDS', 2)
+
+
+def decayed_score(views, bookings, reviews, age_days):
+    weight = 0.5 ** (age_days / HALF_LIFE_DAYS)
+    return (VIEW_WEIGHT * views + BOOKING_WEIGHT * bookings + REVIEW_WEIGHT * reviews) * weight
+
+
+def add(kind, object_id, field, count=1):
+    """Buffer `count` events of one kind (a field of EVENT_FIELDS) for today."""
+    key = (kind, object_id, timezone.localdate())
+    with _lock:
+        _pending[key][field] += count
+    if not _interval():
+        flush()
+    else:
+        _start_flusher()
+
+
+def record_view(instance):
+    """Count a detail page view of a TourPackage or Destination."""
+    add(KIND_PACKAGE if isinstance(instance, TourPackage) else KIND_DESTINATION, instance.pk, 'views')
+
+
+def _with_destinations(batch):
+    """Add package bookings and reviews to the buckets of the packages' destinations."""
+    package_ids = {
+        object_id for (kind, object_id, _), deltas in batch.items()
+        if kind == KIND_PACKAGE and (deltas['bookings'] or deltas['reviews'])
+    }
+    if not package_ids:
+        return batch
+    through = TourPackage.destinations.through
+    destinations = defaultdict(list)
+    for package_id, destination_id in through.objects.filter(tourpackage_id__in=package_ids).values_list(
+        'tourpackage_id', 'destination_id'
+    ):
+        destinations[package_id].append(destination_id)
+
+    expanded = defaultdict(lambda: dict.fromkeys(EVENT_FIELDS, 0))
+    for (kind, object_id, day), deltas in batch.items():
+        for field, delta in deltas.items():
+            expanded[kind, object_id, day][field] += delta
+        if kind == KIND_PACKAGE:
+            for destination_id in destinations.get(object_id, ()):
+                for field in ('bookings', 'reviews'):
+                    expanded[KIND_DESTINATION, destination_id, day][field] += deltas[field]
+    return expanded
+
+
+def flush():
+    """Write all buffered events. Returns the number of buckets written."""
+    global _pending
+    with _lock:
+        batch, _pending = _pending, defaultdict(lambda: dict.fromkeys(EVENT_FIELDS, 0))
+    batch = {key: deltas for key, deltas in batch.items() if any(deltas.values())}
+    if not batch:
+        return 0
+    try:
+        written = _with_destinations(batch)
+        with transaction.atomic():
+            views = defaultdict(int)
+            for (kind, object_id, day), deltas in written.items():
+                deltas = {field: delta for field, delta in deltas.items() if delta}
+                if not deltas:
+                    continue
+                updated = PopularityBucket.objects.filter(kind=kind, object_id=object_id, day=day).update(
+                    **{field: F(field) + delta for field, delta in deltas.items()}
+                )
+                if not updated:
+                    PopularityBucket.objects.create(kind=kind, object_id=object_id, day=day, **deltas)
+                views[kind, object_id] += deltas.get('views', 0)
+            for (kind, object_id), count in views.items():
+                if count:
+                    MODELS[kind].objects.filter(pk=object_id).update(view_count=F('view_count') + count)
+    except Exception:
+        # Put the events back for the next flush
+        with _lock:
+            for key, deltas in batch.items():
+                for field, delta in deltas.items():
+                    _pending[key][field] += delta
+        raise
+    return len(written)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(_interval())
+        try:
+            flush()
+        except Exception:
+            logger.exception('Could not flush popularity counters')
+        finally:
+            close_old_connections()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_forever, name='popularity-counters', daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def refresh(today=None):
+    """
+    Recompute the popularity column of packages and destinations from the
+    buckets and drop buckets past WINDOW_DAYS. Returns the number of rows changed.
+    """
+    today = today or timezone.localdate()
+    PopularityBucket.objects.filter(day__lt=today - timedelta(days=WINDOW_DAYS)).delete()
+
+    scores = {kind: defaultdict(float) for kind in MODELS}
+    buckets = PopularityBucket.objects.values_list('kind', 'object_id', 'day', 'views', 'bookings', 'reviews')
+    for kind, object_id, day, views, bookings, reviews in buckets.iterator(chunk_size=2000):
+        scores[kind][object_id] += decayed_score(views, bookings, reviews, max((today - day).days, 0))
+
+    changed = 0
+    for kind, model in MODELS.items():
+        updates = []
+        for pk, current in model.objects.values_list('pk', 'popularity').iterator(chunk_size=2000):
+            score = round(scores[kind].get(pk, 0.0), 4)
+            if score != current:
+                updates.append(model(pk=pk, popularity=score))
+        # Plain UPDATEs: a new score is no reason to invalidate anything built from these rows
+        model.objects.bulk_update(updates, ['popularity'], batch_size=500)
+        changed += len(updates)
+    return changed
@@ -0,0 +1,148 @@
+"""
+Incremental booking aggregates.
+
+Every booking write moves the booking's contribution out of the counters it
+was counted in and into the ones it belongs to now, inside the writing
+transaction: the business dashboard stats (businesses.BusinessStats) and the
+per-package DAY and MONTH rows of BookingRollup, keyed by the local date the
+booking was made. Trend queries then read at most one row per package and
+period, however many bookings there are.
+"""
+from collections import namedtuple
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from businesses import stats
+from . import inventory
+from .models import BookingRollup, PackageBooking
+
+BookingFacts = namedtuple('BookingFacts', 'business_id package_id day status travelers amount')
+
+FACT_FIELDS = (
+    'travel_business_id', 'package_id', 'created_at', 'status', 'number_of_travelers', 'total_amount',
+)
+STATUS_FIELDS = {status: f'{status.lower()}_bookings' for status, _ in PackageBooking.STATUS_CHOICES}
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _facts(business_id, package_id, created_at, status, travelers, amount):
+    return BookingFacts(business_id, package_id, timezone.localdate(created_at), status, travelers, amount)
+
+
+def stored_facts(pk):
+    """Facts of the booking as currently stored, or None for a new booking."""
+    if pk is None:
+        return None
+    row = PackageBooking.objects.filter(pk=pk).values_list(*FACT_FIELDS).first()
+    return _facts(*row) if row else None
+
+
+def booking_facts(booking):
+    return _facts(
+        booking.travel_business_id, booking.package_id, booking.created_at, booking.status,
+        booking.number_of_travelers, booking.total_amount,
+    )
+
+
+def rollup_counts(facts):
+    """Counters a booking adds to each of its rollup rows."""
+    counts = {STATUS_FIELDS[facts.status]: 1}
+    if facts.status in stats.REVENUE_STATUSES:
+        counts['travelers'] = facts.travelers
+        counts['revenue'] = facts.amount
+    return counts
+
+
+def _rollup_keys(facts):
+    return [
+        (facts.business_id, facts.package_id, 'DAY', facts.day),
+        (facts.business_id, facts.package_id, 'MONTH', month_start(facts.day)),
+    ]
+
+
+def _increment(key, deltas, create):
+    business_id, package_id, period, day = key
+    rows = BookingRollup.objects.filter(package_id=package_id, period=period, day=day)
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if rows.update(**changes) or not create:
+        return
+    try:
+        with transaction.atomic():
+            BookingRollup.objects.create(
+                business_id=business_id, package_id=package_id, period=period, day=day, **deltas
+            )
+    except IntegrityError:
+        # Created by a concurrent booking in between
+        rows.update(**changes)
+
+
+def apply_booking_change(before=None, after=None):
+    """
+    Move a booking's contribution from `before` to `after` (BookingFacts, or None
+    for inserts and deletes). Must run inside the writing transaction.
+    """
+    apply_booking_changes([(before, after)])
+
+
+def apply_booking_changes(changes):
+    """apply_booking_change for many (before, after) pairs, one UPDATE per touched row."""
+    changes = list(changes)
+    stats.apply_changes(
+        (
+            before and stats.booking_counts(before.business_id, before.status, before.amount),
+            after and stats.booking_counts(after.business_id, after.status, after.amount),
+        )
+        for before, after in changes
+    )
+
+    deltas = {}
+    current = set()
+    for before, after in changes:
+        for sign, facts in ((-1, before), (1, after)):
+            if facts is None:
+                continue
+            counts = rollup_counts(facts)
+            for key in _rollup_keys(facts):
+                key_deltas = deltas.setdefault(key, {})
+                for field, value in counts.items():
+                    key_deltas[field] = key_deltas.get(field, 0) + sign * value
+        if after is not None:
+            current.update(_rollup_keys(after))
+
+    # Rows are only created for the bookings' current place; removals never
+    # create rows, so cascading deletes do not resurrect rows of a deleted package
+    for key, key_deltas in deltas.items():
+        key_deltas = {field: value for field, value in key_deltas.items() if value}
+        if key_deltas:
+            _increment(key, key_deltas, create=key in current)
+
+
+def bulk_set_status(bookings, status):
+    """
+    Set the status of the given bookings with a single UPDATE. Queryset updates
+    bypass PackageBooking.save(), so the stats and rollup counters are moved
+    here in the same transaction, and seats of cancelled bookings are released.
+    Returns the number of bookings changed.
+    """
+    with transaction.atomic():
+        rows = list(bookings.exclude(status=status).select_for_update().values_list('pk', *FACT_FIELDS))
+        if not rows:
+            return 0
+        pks = [row[0] for row in rows]
+        PackageBooking.objects.filter(pk__in=pks).update(status=status, updated_at=timezone.now())
+
+        changes = []
+        for row in rows:
+            before = _facts(*row[1:])
+            changes.append((before, before._replace(status=status)))
+        apply_booking_changes(changes)
+
+        if status == 'CANCELLED':
+            inventory.release_bookings(pks)
+    return len(rows)
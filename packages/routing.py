@@ -0,0 +1,205 @@
+"""
+Route suggestions for multi-destination packages.
+
+A haversine distance matrix over all active destinations is precomputed with
+NumPy and kept per process (rebuilt when destinations change, see signals.py).
+A visiting order is proposed with nearest-neighbour construction followed by
+2-opt improvement, and the package duration is split into days per stop.
+"""
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+
+from destinations.models import Destination
+
+EARTH_RADIUS_KM = 6371.0088
+VERSION_CACHE_KEY = 'routing:version'
+MAX_MATRIX_AGE = 300
+MAX_STOPS = 30
+# Longest trip a route is planned for
+MAX_DAYS = 365
+
+
+def haversine_matrix(lat, lon):
+    """Pairwise great-circle distances in km for coordinate arrays in degrees."""
+    lat = np.radians(lat)[:, None]
+    lon = np.radians(lon)[:, None]
+    dlat = lat - lat.T
+    dlon = lon - lon.T
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlon / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(np.float32)
+
+
+class DistanceMatrix:
+    """Distances between every pair of active destinations."""
+
+    def __init__(self, version):
+        rows = list(Destination.objects.filter(is_active=True).values_list(
+            'id', 'name', 'slug', 'latitude', 'longitude', 'min_days', 'max_days'
+        ))
+        self.version = version
+        self.built_at = time.monotonic()
+        self.position = {row[0]: i for i, row in enumerate(rows)}
+        self.destinations = rows
+        coords = np.array([(float(row[3]), float(row[4])) for row in rows], dtype=np.float64).reshape(-1, 2)
+        self.distances = haversine_matrix(coords[:, 0], coords[:, 1])
+
+    def submatrix(self, destination_ids):
+        idx = np.array([self.position[i] for i in destination_ids])
+        return self.distances[np.ix_(idx, idx)].astype(np.float64)
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def mark_stale():
+    """Invalidate the distance matrix in every process sharing the cache."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def get_matrix():
+    global _matrix
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    matrix = _matrix
+    if matrix is not None and matrix.version == version and time.monotonic() - matrix.built_at < MAX_MATRIX_AGE:
+        return matrix
+    with _matrix_lock:
+        if _matrix is None or _matrix.version != version or time.monotonic() - _matrix.built_at >= MAX_MATRIX_AGE:
+            _matrix = DistanceMatrix(version)
+        return _matrix
+
+
+def path_length(dist, order):
+    return float(dist[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbour(dist, start):
+    n = len(dist)
+    order = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[order[-1]])
+        nxt = int(np.argmin(row))
+        order.append(nxt)
+        visited[nxt] = True
+    return np.array(order)
+
+
+def two_opt(dist, order, fixed_start):
+    """Improve an open path by reversing segments while that shortens it."""
+    order = order.copy()
+    n = len(order)
+    first = 1 if fixed_start else 0
+    improved = True
+    while improved:
+        improved = False
+        for i in range(first, n - 1):
+            # Reversing order[i..j] replaces edges (i-1, i) and (j, j+1)
+            j = np.arange(i + 1, n)
+            a, b = order[i - 1] if i > 0 else -1, order[i]
+            c = order[j]
+            e = np.append(order[j[:-1] + 1], -1)
+
+            before = (dist[a, b] if a >= 0 else 0.0) + np.where(e >= 0, dist[c, e], 0.0)
+            after = (dist[a, c] if a >= 0 else np.zeros(len(j))) + np.where(e >= 0, dist[b, e], 0.0)
+            gain = before - after
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                order[i:j[best] + 1] = order[i:j[best] + 1][::-1]
+                improved = True
+    return order
+
+
+def split_days(min_days, max_days, total_days):
+    """
+    Allocate total_days over stops, giving each stop at least its min_days.
+    Extra days go to stops in proportion to their min_days, never past max_days.
+    """
+    allocation = [max(d, 1) for d in min_days]
+    extra = total_days - sum(allocation) if total_days else 0
+    # Each pass either places every extra day or fills at least one stop
+    while extra > 0:
+        room = [i for i, limit in enumerate(max_days) if limit is None or allocation[i] < limit]
+        if not room:
+            break
+        weight = sum(max(min_days[i], 1) for i in room)
+        shares = {i: divmod(extra * max(min_days[i], 1), weight) for i in room}
+        # Days left over by rounding down go to the largest remainders
+        leftover = extra - sum(share for share, _ in shares.values())
+        for i in sorted(room, key=lambda k: -shares[k][1])[:leftover]:
+            shares[i] = (shares[i][0] + 1, 0)
+        for i in room:
+            share = shares[i][0]
+            if max_days[i] is not None:
+                share = min(share, max_days[i] - allocation[i])
+            allocation[i] += share
+            extra -= share
+    return allocation
+
+
+def plan_route(destination_ids, total_days=None, start_id=None):
+    """
+    Suggest a visiting order and day split for the given destinations.
+    Raises ValueError for unknown or inactive destination ids.
+    """
+    destination_ids = list(dict.fromkeys(destination_ids))
+    matrix = get_matrix()
+    unknown = [i for i in destination_ids if i not in matrix.position]
+    if unknown:
+        raise ValueError(f"Unknown or inactive destinations: {', '.join(map(str, unknown))}")
+    if start_id is not None and start_id not in destination_ids:
+        raise ValueError('Start destination must be one of the selected destinations')
+
+    dist = matrix.submatrix(destination_ids)
+    if start_id is not None:
+        order = two_opt(dist, nearest_neighbour(dist, destination_ids.index(start_id)), fixed_start=True)
+    else:
+        # Nearest-neighbour from every start is cheap; only the best few get 2-opt
+        seeds = sorted((nearest_neighbour(dist, s) for s in range(len(dist))), key=lambda o: path_length(dist, o))
+        candidates = [two_opt(dist, seed, fixed_start=False) for seed in seeds[:3]]
+        order = min(candidates, key=lambda o: path_length(dist, o))
+
+    rows = [matrix.destinations[matrix.position[destination_ids[i]]] for i in order]
+    min_days = [row[5] for row in rows]
+    max_days = [row[6] for row in rows]
+    allocation = split_days(min_days, max_days, total_days)
+
+    stops = []
+    itinerary = []
+    day = 1
+    for k, (row, days) in enumerate(zip(rows, allocation)):
+        destination_id, name, slug = row[0], row[1], row[2]
+        leg_km = float(dist[order[k - 1], order[k]]) if k else 0.0
+        stops.append({
+            'destination_id': destination_id,
+            'name': name,
+            'slug': slug,
+            'leg_km': round(leg_km, 1),
+            'days': days,
+            'start_day': day,
+        })
+        for offset in range(days):
+            itinerary.append({
+                'day': day + offset,
+                'title': f"Travel to {name}" if offset == 0 and k else f"Explore {name}",
+                'description': '',
+                'destination_id': destination_id,
+            })
+        day += days
+
+    minimum = sum(max(d, 1) for d in min_days)
+    return {
+        'total_km': round(path_length(dist, order), 1),
+        'total_days': day - 1,
+        'minimum_days': minimum,
+        'fits_duration': total_days is None or total_days >= minimum,
+        'stops': stops,
+        'itinerary': itinerary,
+    }
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from businesses import stats as business_stats
+from destinations.models import Destination
+from heavenknows import images
+from . import inventory, planner, popularity, rollups, routing
+from .models import PackageBooking, PackageReview, TourPackage
+
+# Fields each in-process index is built from; saves touching only other
+# fields (e.g. view_count on every detail page hit) do not invalidate it.
+PLANNER_FIELDS = {
+    Destination: {'name', 'slug', 'min_days', 'max_days', 'expected_cost_min', 'expected_cost_max',
+                  'is_featured', 'is_active'},
+    TourPackage: {'title', 'slug', 'duration_days', 'price_per_person', 'is_featured', 'status'},
+}
+ROUTING_FIELDS = {'name', 'slug', 'latitude', 'longitude', 'min_days', 'max_days', 'is_active'}
+
+images.normalize_on_upload(TourPackage, 'cover_image', placeholder_field='cover_image_placeholder')
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_save, sender=TourPackage)
+def refresh_planner_on_save(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, PLANNER_FIELDS[sender]):
+        transaction.on_commit(planner.mark_stale)
+
+
+@receiver(post_delete, sender=Destination)
+@receiver(post_delete, sender=TourPackage)
+def refresh_planner_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(planner.mark_stale)
+
+
+@receiver(post_save, sender=Destination)
+def refresh_routing_on_save(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, ROUTING_FIELDS):
+        transaction.on_commit(routing.mark_stale)
+
+
+@receiver(post_delete, sender=Destination)
+def refresh_routing_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(routing.mark_stale)
+
+
+@receiver(post_save, sender=PackageBooking)
+def release_seats_on_cancel(sender, instance, update_fields=None, **kwargs):
+    if instance.status == 'CANCELLED' and _touches(update_fields, {'status'}):
+        inventory.release_booking(instance)
+
+
+@receiver(post_delete, sender=TourPackage)
+def update_business_stats_on_package_delete(sender, instance, **kwargs):
+    business_stats.apply_change(before=business_stats.package_counts(instance.travel_business_id, instance.status))
+
+
+@receiver(post_delete, sender=PackageBooking)
+def update_booking_aggregates_on_delete(sender, instance, **kwargs):
+    rollups.apply_booking_change(before=rollups.booking_facts(instance))
+
+
+# Counted once committed, so rolled back bookings and reviews never are
+
+@receiver(post_save, sender=PackageBooking)
+def count_booking(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: popularity.add(popularity.KIND_PACKAGE, instance.package_id, 'bookings'))
+
+
+@receiver(post_save, sender=PackageReview)
+def count_review(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: popularity.add(popularity.KIND_PACKAGE, instance.package_id, 'reviews'))
@@ -6,8 +6,13 @@ app_name = 'packages'
 urlpatterns = [
     path('', views.PackageListView.as_view(), name='list'),
     path('create/', views.PackageCreateView.as_view(), name='create'),
+    path('api/planner/', views.trip_planner, name='trip_planner'),
+    path('api/route/', views.route_suggestion, name='route_suggestion'),
+    path('api/destinations/', views.destination_picker, name='destination_picker'),
     path('<slug:slug>/', views.PackageDetailView.as_view(), name='detail'),
     path('<slug:slug>/review/', views.PackageReviewCreateView.as_view(), name='add_review'),
     path('<slug:slug>/book/', views.PackageBookingCreateView.as_view(), name='book'),
+    path('<slug:slug>/availability/', views.departure_availability, name='departure_availability'),
+    path('<slug:slug>/hold/', views.hold_departure_seats, name='hold_seats'),
     path('booking/<str:booking_number>/confirmation/', views.BookingConfirmationView.as_view(), name='booking_confirmation'),
 ]
\ No newline at end of file
@@ -57,7 +57,12 @@ class PackageCreateView(LoginRequiredMixin, CreateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['all_destinations'] = Destination.objects.filter(is_active=True).select_related('category')
+        # Only the already-selected destinations are rendered (e.g. after a failed submit);
+        # the rest of the catalog is loaded on demand from the picker API
+        selected_ids = [i for i in context['form']['destinations'].value() or [] if str(i).isdigit()]
+        context['selected_destinations'] = Destination.objects.filter(
+            id__in=selected_ids, is_active=True
+        ).only('id', 'name')
         return context
     
 
@@ -128,7 +133,8 @@ class PackageListView(ListView):
         elif sort_by == 'duration_long':
             queryset = queryset.order_by('-duration_days')
         elif sort_by == 'popular':
-            queryset = queryset.order_by('-view_count')
+            # Decayed score kept by the refresh_popularity command
+            queryset = queryset.order_by('-popularity', '-id')
         else:
             queryset = queryset.order_by('-is_featured', '-created_at')
 
@@ -165,8 +171,13 @@ from django.http import JsonResponse
 from django.db.models import Avg, Count
 from django.db import transaction
 
-from .models import TourPackage, PackageReview, PackageBooking
+from .models import TourPackage, PackageReview, PackageBooking, SeatHold
 from .forms import PackageReviewForm, PackageBookingForm
+from .numbering import allocate_booking_number
+from .idempotency import idempotent, mark_failed
+from . import inventory, popularity
+from django.utils.decorators import method_decorator
+import uuid
 
 
 class PackageDetailView(DetailView):
@@ -216,6 +227,7 @@ class PackageDetailView(DetailView):
             context['user_review'] = None
         
         # Forms
+        context['idempotency_key'] = uuid.uuid4().hex
         context['review_form'] = PackageReviewForm()
         context['booking_form'] = PackageBookingForm(initial={
             'lead_traveler_name': self.request.user.get_full_name() if self.request.user.is_authenticated else '',
@@ -229,13 +241,13 @@ class PackageDetailView(DetailView):
             destinations__in=package.destinations.all()
         ).exclude(id=package.id).distinct()[:3]
         
-        # Increment view count
-        package.view_count += 1
-        package.save(update_fields=['view_count'])
+        # Counted in the next popularity flush
+        popularity.record_view(package)
         
         return context
 
 
+@method_decorator(idempotent('add_review'), name='post')
 class PackageReviewCreateView(LoginRequiredMixin, CreateView):
     """Create a review for a package"""
     model = PackageReview
@@ -258,10 +270,12 @@ class PackageReviewCreateView(LoginRequiredMixin, CreateView):
         return redirect('packages:detail', slug=package.slug)
     
     def form_invalid(self, form):
+        mark_failed(self.request)
         messages.error(self.request, 'Please correct the errors in your review.')
         return redirect('packages:detail', slug=self.kwargs['slug'])
 
 
+@method_decorator(idempotent('book'), name='post')
 class PackageBookingCreateView(LoginRequiredMixin, CreateView):
     """Create a booking for a package"""
     model = PackageBooking
@@ -271,8 +285,11 @@ class PackageBookingCreateView(LoginRequiredMixin, CreateView):
         package = get_object_or_404(TourPackage, slug=self.kwargs['slug'], status='PUBLISHED')
         
         try:
+            # Allocated outside the transaction so it comes from the in-memory block
+            booking_number = allocate_booking_number()
             with transaction.atomic():
                 booking = form.save(commit=False)
+                booking.booking_number = booking_number
                 booking.package = package
                 booking.user = self.request.user
                 
@@ -288,7 +305,21 @@ class PackageBookingCreateView(LoginRequiredMixin, CreateView):
                     messages.error(self.request, f'Maximum group size is {package.group_size_max} travelers.')
                     return self.form_invalid(form)
                 
-                booking.save()
+                # Reserve seats on the departure; a hold from the hold API is confirmed,
+                # otherwise seats are held and confirmed in this transaction
+                hold_token = self.request.POST.get('hold_token')
+                if hold_token:
+                    hold = SeatHold.objects.filter(
+                        token=hold_token, user=self.request.user, departure__package=package,
+                        departure__start_date=booking.preferred_start_date,
+                        seats=booking.number_of_travelers,
+                    ).first()
+                    if hold is None:
+                        raise inventory.HoldExpired('Your seat reservation does not match this booking.')
+                    booking.save()
+                    inventory.confirm_hold(hold, booking)
+                else:
+                    inventory.book_seats(booking)
                 
                 messages.success(
                     self.request, 
@@ -297,11 +328,15 @@ class PackageBookingCreateView(LoginRequiredMixin, CreateView):
                 )
                 return redirect('packages:booking_confirmation', booking_number=booking.booking_number)
         
+        except (inventory.SoldOut, inventory.HoldExpired) as e:
+            messages.error(self.request, str(e))
+            return self.form_invalid(form)
         except Exception as e:
             messages.error(self.request, f'Booking failed: {str(e)}')
             return self.form_invalid(form)
     
     def form_invalid(self, form):
+        mark_failed(self.request)
         messages.error(self.request, 'Please correct the errors in your booking form.')
         return redirect('packages:detail', slug=self.kwargs['slug'])
 
@@ -315,4 +350,185 @@ class BookingConfirmationView(LoginRequiredMixin, DetailView):
     slug_url_kwarg = 'booking_number'
     
     def get_queryset(self):
-        return PackageBooking.objects.filter(user=self.request.user).select_related('package', 'package__travel_business')
\ No newline at end of file
+        return PackageBooking.objects.filter(user=self.request.user).select_related('package', 'package__travel_business')
+
+
+from django.views.decorators.http import require_GET
+from . import planner
+
+
+@require_GET
+def trip_planner(request):
+    """
+    Destinations and packages that fit a trip length and budget.
+    Query params: days, budget (total NPR), travelers (default 1),
+    type ('destination' or 'package', optional), limit (default 20, max 50).
+    """
+    try:
+        days = int(request.GET.get('days', ''))
+        budget = float(request.GET.get('budget', ''))
+        travelers = int(request.GET.get('travelers', 1))
+        limit = min(int(request.GET.get('limit', 20)), 50)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'days and budget must be numbers'}, status=400)
+    if days < 1 or budget <= 0 or travelers < 1 or limit < 1:
+        return JsonResponse({'success': False, 'error': 'days, budget, travelers and limit must be positive'}, status=400)
+
+    kind = {'destination': planner.KIND_DESTINATION, 'package': planner.KIND_PACKAGE}.get(request.GET.get('type'))
+    results = planner.get_index().search(days, budget / travelers, kind=kind, limit=limit)
+
+    return JsonResponse({
+        'success': True,
+        'days': days,
+        'budget_per_person': round(budget / travelers, 2),
+        'results': results,
+    })
+
+
+from . import routing
+
+
+@require_GET
+def route_suggestion(request):
+    """
+    Suggested visiting order and day split for a set of destinations.
+    Query params: destinations (comma-separated ids), days (optional total
+    duration), start (optional destination id to begin from).
+    """
+    try:
+        destination_ids = [int(i) for i in request.GET.get('destinations', '').split(',') if i.strip()]
+        days = int(request.GET['days']) if request.GET.get('days') else None
+        start_id = int(request.GET['start']) if request.GET.get('start') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'destinations, days and start must be numbers'}, status=400)
+    if not destination_ids:
+        return JsonResponse({'success': False, 'error': 'Select at least one destination'}, status=400)
+    if len(destination_ids) > routing.MAX_STOPS:
+        return JsonResponse({'success': False, 'error': f'At most {routing.MAX_STOPS} destinations per route'}, status=400)
+    if days is not None and not 1 <= days <= routing.MAX_DAYS:
+        return JsonResponse({'success': False, 'error': f'days must be between 1 and {routing.MAX_DAYS}'}, status=400)
+
+    try:
+        route = routing.plan_route(destination_ids, total_days=days, start_id=start_id)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({'success': True, **route})
+
+
+import base64
+
+
+def _encode_cursor(name, pk):
+    return base64.urlsafe_b64encode(json.dumps([name, pk]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    name, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return str(name), int(pk)
+
+
+@require_GET
+def destination_picker(request):
+    """
+    Cursor-paginated, searchable list of active destinations for the package
+    create form. Query params: q (search), cursor (from next_cursor), limit (max 50).
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 24)), 50))
+    except ValueError:
+        limit = 24
+
+    queryset = Destination.objects.filter(is_active=True)
+    search_query = request.GET.get('q', '').strip()
+    if search_query:
+        queryset = queryset.filter(Q(name__icontains=search_query) | Q(district__icontains=search_query))
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            name, pk = _decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+        queryset = queryset.filter(Q(name__gt=name) | Q(name=name, id__gt=pk))
+
+    rows = list(
+        queryset.select_related('category')
+        .only('id', 'name', 'district', 'cover_image', 'cover_image_width', 'cover_image_height',
+              'cover_image_placeholder', 'category__name', 'category__icon')
+        .order_by('name', 'id')[:limit + 1]
+    )
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {
+                'id': d.id,
+                'name': d.name,
+                'district': d.district,
+                'category': d.category.name,
+                'category_icon': d.category.icon,
+                'cover_image': d.cover_image.url if d.cover_image else None,
+                'cover_image_width': d.cover_image_width,
+                'cover_image_height': d.cover_image_height,
+                'cover_image_placeholder': d.cover_image_placeholder,
+            }
+            for d in rows
+        ],
+        'next_cursor': _encode_cursor(rows[-1].name, rows[-1].id) if has_next else None,
+    })
+
+
+from datetime import date
+from django.views.decorators.http import require_POST
+
+
+@require_GET
+def departure_availability(request, slug):
+    """Seats left on a package departure. Query param: date (YYYY-MM-DD)."""
+    package = get_object_or_404(TourPackage, slug=slug, status='PUBLISHED')
+    try:
+        start_date = date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid date'}, status=400)
+    return JsonResponse({
+        'success': True,
+        'date': start_date.isoformat(),
+        'seats_available': inventory.seats_available(package, start_date),
+    })
+
+
+@require_POST
+def hold_departure_seats(request, slug):
+    """
+    Hold seats on a departure for a few minutes while the traveler completes
+    the booking. POST params: date (YYYY-MM-DD), travelers. The returned token
+    is submitted with the booking form as hold_token.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+    package = get_object_or_404(TourPackage, slug=slug, status='PUBLISHED')
+    try:
+        start_date = date.fromisoformat(request.POST.get('date', ''))
+        travelers = int(request.POST.get('travelers', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'date and travelers are required'}, status=400)
+    if not package.group_size_min <= travelers <= package.group_size_max:
+        return JsonResponse({
+            'success': False,
+            'error': f'Group size must be between {package.group_size_min} and {package.group_size_max}.'
+        }, status=400)
+
+    try:
+        hold = inventory.hold_seats(package, start_date, travelers, request.user)
+    except inventory.SoldOut as e:
+        return JsonResponse({'success': False, 'error': str(e), 'seats_available': e.seats_available}, status=409)
+
+    return JsonResponse({
+        'success': True,
+        'hold_token': str(hold.token),
+        'seats': hold.seats,
+        'expires_at': hold.expires_at.isoformat(),
+    })